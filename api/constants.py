@@ -6,8 +6,14 @@ UNHEALTHY = "unhealthy"
 
 class APIEndpoints(Enum):
     LIVENESS = "/api/v1/healthy"
+    READINESS = "/api/v1/ready"
     MENTIONED_STOCK = "/api/v1/mentioned_stock"
+    MENTIONED_STOCK_STREAM = "/api/v1/mentioned_stock/stream"
     CUSTOMER_STOCKS = "/api/v1/customer_stocks"
+    BARS = "/api/v1/bars"
+    CUSTOMER_PORTFOLIO_STOCKS = "/api/v1/customers/{customer_id}/stocks"
+    CUSTOMERS_STOCKS = "/api/v1/customers/stocks"
+    CUSTOMER_ANALYTICS = "/api/v1/customers/{customer_id}/analytics"
     DOCS = "/api/v1/docs"
     REDOC = "/api/v1/redoc"
     OPENAPI_URL = "/api/v1/openapi.json"
@@ -1,32 +1,38 @@
+# The startup time is logged once the app is built, with the import times of each module if PROFILE_IMPORTS=1
+import time
+STARTED = time.perf_counter()
+from shared import startup_profile
+startup_profile.start()
+
 import uvicorn
-from fastapi import FastAPI, APIRouter, BackgroundTasks
+from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 import logging
 import argparse
-import watchtower
-import boto3
+from functools import partial
 import os
 from controllers.service_initializer import ServiceInitializer
+from controllers.portfolio_service import PortfolioService
+from controllers.portfolio_analytics import PortfolioAnalytics
+from controllers.cache_snapshot import CacheSnapshotter
 
 from api.routes.liveness import Liveness
+from api.routes.readiness import Readiness
 from api.routes.fininfo import Fininfo
+from api.routes.customers import Customers
 
 from api.constants import APIEndpoints, LoggingMessages, Env
 from clients.s3_client import S3FileStore
-
-async def background_function():
-    logger.info("Running startup tasks...")
-    # Only pass logger to initialize
-    service_initializer = ServiceInitializer()
-    await service_initializer.initialize(logger)
-    logger.info("Startup tasks completed")
+from clients.IDChat_client import IDChatClient
+from clients.cloudwatch_logging import CloudWatchLogging
 
 def create_app(
     logger: logging.Logger,
     filestore: S3FileStore,
     env: str,
-    customer_id: str
+    customer_id: str,
+    cloudwatch_logging: CloudWatchLogging = None
     ) -> FastAPI:
     
     app = FastAPI(
@@ -58,13 +64,44 @@ def create_app(
     fininfo_route.add_api_routes(router)
     logger.info("Added fininfo routes")
     
+    portfolio_service = PortfolioService()
+    portfolio_analytics = PortfolioAnalytics(portfolio_service)
+    customers_route = Customers(portfolio_service, portfolio_analytics)
+    logger.info("Adding customers routes")
+    customers_route.add_api_routes(router)
+    logger.info("Added customers routes")
+    
+    
+    # Restore the bar cache snapshot of other pods before the cache is warmed
+    snapshotter = None
+    if filestore is not None:
+        snapshotter = CacheSnapshotter(filestore, prefix=f"{env}/bar_cache")
+    
+    service_initializer = ServiceInitializer(
+        customer_id=customer_id,
+        portfolio_service=portfolio_service,
+        snapshotter=snapshotter
+    )
+    readiness_route = Readiness(service_initializer)
+    logger.info("Adding readiness routes")
+    readiness_route.add_api_routes(router)
+    logger.info("Added readiness routes")
+    
     
     app.include_router(router)
 
-
-    background_task = BackgroundTasks()
-    background_task.add_task(background_function)
-    app.add_event_handler("startup", background_task)        
+    # One connection pool to the IDChat API for the whole process
+    app.add_event_handler("startup", IDChatClient.shared().ensure_session)
+    # Warm-up runs in the background, the readiness route reports when it is done
+    app.add_event_handler("startup", partial(service_initializer.start, logger))
+    app.add_event_handler("shutdown", service_initializer.stop)
+    if snapshotter is not None:
+        app.add_event_handler("startup", snapshotter.start)
+        app.add_event_handler("shutdown", snapshotter.stop)
+    app.add_event_handler("shutdown", IDChatClient.close_shared)
+    if cloudwatch_logging is not None:
+        # Registered last, so the shutdown of the handlers above is still shipped
+        app.add_event_handler("shutdown", cloudwatch_logging.shutdown)
     
     logger.info(LoggingMessages.API_READY.value)
     
@@ -91,15 +128,13 @@ if __name__ == '__main__':
     formatter = logging.Formatter(FORMAT)
     
     os.environ["AWS_DEFAULT_REGION"] = "eu-central-1"
-    #cloudwatch logger
-    cloudwatch_handler = watchtower.CloudWatchLogHandler(
+    #cloudwatch logger, records are queued and shipped in batches from a background thread
+    cloudwatch_logging = CloudWatchLogging(
         log_group='starthack',
         stream_name=f'starthack-{ENV}',
-        use_queues=False #required otherwise handler shuts down in uvicorn
-    )
-    cloudwatch_handler.setLevel(logging.INFO)
-    cloudwatch_handler.setFormatter(formatter)
-    logger.addHandler(cloudwatch_handler)
+        formatter=formatter,
+        level=logging.INFO
+    ).attach(logger)
     
     #console logger
     console_handler = logging.StreamHandler()
@@ -107,17 +142,24 @@ if __name__ == '__main__':
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
         
+    build_started = time.perf_counter()
     try:
         app = create_app(
             logger=logger,
             filestore=filestore,
             env=ENV,
-            customer_id=args.customer_id  # Pass the customer_id
+            customer_id=args.customer_id,  # Pass the customer_id
+            cloudwatch_logging=cloudwatch_logging
             )
     except Exception as e:
         logger.error("An error occurred during startup")
         logger.error(e)
         raise e
+    built = time.perf_counter()
+    logger.info(f"Startup took {built - STARTED:.3f}s: imports {build_started - STARTED:.3f}s, building the app {built - build_started:.3f}s")
+    import_report = startup_profile.report()
+    if import_report:
+        logger.info(import_report)
     
     
     uvicorn.run(
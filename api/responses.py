@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from shared.compression import MIN_COMPRESS_SIZE, compress, negotiate
+from shared.encoding import dumps
+
+# Bodies larger than this are compressed off the event loop
+THREAD_COMPRESS_SIZE = 64 * 1024
+
+
+class EncodedBody:
+    """Pre-serialized response body together with its compressed variants, each built once."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._variants: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding: str) -> bytes:
+        content = self._variants.get(encoding)
+        if content is None:
+            content = compress(self.body, encoding)
+            with self._lock:
+                content = self._variants.setdefault(encoding, content)
+        return content
+
+    def has_variant(self, encoding: str) -> bool:
+        return encoding in self._variants
+
+
+class EncodedBodyCache:
+    """Least recently used encoded bodies, keyed for example by ETag."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Any, EncodedBody]" = OrderedDict()
+
+    def get(self, key: Any) -> Optional[EncodedBody]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Any, body: EncodedBody) -> EncodedBody:
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
+
+
+async def encoded_response(
+    request: Request,
+    body: EncodedBody,
+    headers: Optional[Dict[str, str]] = None,
+    media_type: str = "application/json"
+) -> Response:
+    """
+    Send a pre-serialized body, compressed with the best encoding the client accepts.
+
+    The ETag of a compressed response carries the encoding as a suffix, as the
+    bytes differ from the uncompressed representation.
+    """
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    encoding = negotiate(request.headers.get("accept-encoding")) if len(body.body) >= MIN_COMPRESS_SIZE else None
+    if encoding is None:
+        return Response(content=body.body, media_type=media_type, headers=headers)
+
+    if body.has_variant(encoding) or len(body.body) < THREAD_COMPRESS_SIZE:
+        content = body.variant(encoding)
+    else:
+        content = await asyncio.to_thread(body.variant, encoding)
+    headers["Content-Encoding"] = encoding
+    if "ETag" in headers:
+        headers["ETag"] = f'{headers["ETag"][:-1]}-{encoding}"'
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+async def json_response(request: Request, data: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Serialize data with the fast encoder and send it compressed, skipping jsonable_encoder."""
+    return await encoded_response(request, EncodedBody(dumps(data)), headers)
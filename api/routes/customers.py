@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Request, Query
+from fastapi.responses import Response
+from typing import Dict
+
+from api.constants import APIEndpoints
+from api.responses import json_response
+from controllers.portfolio_service import PortfolioService
+from controllers.portfolio_analytics import PortfolioAnalytics
+
+
+class Customers:
+
+    def __init__(self, portfolio_service: PortfolioService, portfolio_analytics: PortfolioAnalytics) -> None:
+        self.portfolio_service = portfolio_service
+        self.portfolio_analytics = portfolio_analytics
+    
+    def add_api_routes(self, router: APIRouter) -> None:
+        router.add_api_route(APIEndpoints.CUSTOMERS_STOCKS.value, self.get_customers_stocks, methods=['GET'])
+        router.add_api_route(APIEndpoints.CUSTOMER_PORTFOLIO_STOCKS.value, self.get_customer_stocks, methods=['GET'])
+        router.add_api_route(APIEndpoints.CUSTOMER_ANALYTICS.value, self.get_customer_analytics, methods=['GET'])
+    
+    async def get_customer_stocks(
+        self,
+        request: Request,
+        customer_id: str,
+        metric: str = Query("market_cap", description="Metric to compare the companies on")
+    ) -> Response:
+        """
+        Return the comparison of a customer's companies, computed on demand
+        
+        Args:
+            request: FastAPI request object
+            customer_id: The ID of the customer
+            metric: Metric to compare the companies on
+            
+        Returns:
+            Response: The comparison of the customer's companies
+        """
+        return await json_response(request, await self.portfolio_service.get_customer_stocks(customer_id, metric))
+
+    async def get_customers_stocks(
+        self,
+        request: Request,
+        ids: str = Query(..., description="Comma separated customer IDs"),
+        metric: str = Query("market_cap", description="Metric to compare the companies on")
+    ) -> Response:
+        """
+        Return the comparisons of several customers, fetching each company only once
+        
+        Args:
+            request: FastAPI request object
+            ids: Comma separated customer IDs
+            metric: Metric to compare the companies on
+            
+        Returns:
+            Response: Comparisons keyed by customer ID and fetch stats
+        """
+        customer_ids = [customer_id.strip() for customer_id in ids.split(",") if customer_id.strip()]
+        return await json_response(request, await self.portfolio_service.get_customers_stocks(customer_ids, metric))
+
+    async def get_customer_analytics(
+        self,
+        request: Request,
+        customer_id: str,
+        window: int = Query(20, ge=2, le=250, description="Trading days of the rolling volatility")
+    ) -> Response:
+        """
+        Return returns, volatility, drawdown and correlations of a customer's portfolio
+        
+        Args:
+            request: FastAPI request object
+            customer_id: The ID of the customer
+            window: Trading days of the rolling volatility
+            
+        Returns:
+            Response: Per instrument and portfolio analytics
+        """
+        return await json_response(request, await self.portfolio_analytics.get_analytics(customer_id, window))
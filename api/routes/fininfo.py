@@ -1,29 +1,53 @@
-from fastapi import APIRouter, Request
-from typing import Dict
-import os
-import json
-
-from api.constants import APIEndpoints
 from fastapi import APIRouter, Request, Query
-from typing import Dict, Optional
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import Optional
+import asyncio
+import hashlib
+import json
 
 from api.constants import APIEndpoints
 from controllers.IDChat_controller import IDChatController
+from shared.constants import MENTIONED_STOCK_FILE, CUSTOMER_STOCKS_FILE
+from shared.snapshot_cache import snapshot_cache
+from shared.ohlcv_store import ohlcv_store
+from shared.broadcaster import Broadcaster, mentioned_stock_events
+from shared.encoding import dumps
+from shared.bar_encoding import MEDIA_TYPES, encode_bars
+from api.responses import EncodedBody, EncodedBodyCache, encoded_response
+from controllers.stock_query import StockDocumentIndex
+
+# Seconds between comments that keep idle event streams open through proxies
+KEEPALIVE_INTERVAL = 15.0
 
 
-def read_file(file_path: str) -> Dict:
-    """Read and parse a JSON file."""
-    with open(file_path, 'r') as file:
-        return json.load(file)
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag, ignoring weak validators."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    # Compressed representations carry the encoding as suffix, e.g. "<etag>-gzip"
+    return any(candidate == etag or candidate.startswith(etag[:-1] + "-") for candidate in candidates)
+
+
+def sse_event(event_id: int, name: str, data: bytes) -> bytes:
+    """Encode one server-sent event, data must not contain newlines."""
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event_id, name.encode(), data)
+
         
 class Fininfo:
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, events: Optional[Broadcaster] = None) -> None:
+        self.events = events if events is not None else mentioned_stock_events
+        # Serialized query responses, keyed by their ETag and so by snapshot version
+        self.query_bodies = EncodedBodyCache()
     
     def add_api_routes(self, router: APIRouter) -> None:
         router.add_api_route(APIEndpoints.MENTIONED_STOCK.value, self.get_stock_data, methods=['GET'])
+        router.add_api_route(APIEndpoints.MENTIONED_STOCK_STREAM.value, self.stream_stock_data, methods=['GET'])
         router.add_api_route(APIEndpoints.CUSTOMER_STOCKS.value, self.get_customer_stocks, methods=['GET'])
+        router.add_api_route(APIEndpoints.BARS.value, self.get_bars, methods=['GET'])
 
     
     # async def get_stock_data(
@@ -44,49 +68,181 @@ class Fininfo:
     async def get_stock_data(
         self, 
         request: Request,
-        company: str = Query("Apple", description="Company name to analyze")
-    ) -> Dict:
-        # Create and initialize controller
-        # Define the path to your JSON file
-        file_path = os.path.join(os.path.dirname(__file__), '../../data/mentioned_stock.json')
+        company: Optional[str] = Query(None, description="Comma separated companies to return, all if omitted"),
+        fields: str = Query("all", description="all, bars or summary"),
+        start: Optional[str] = Query(None, alias="from", description="First date of the bars (YYYY-MM-DD or DD.MM.YYYY)"),
+        end: Optional[str] = Query(None, alias="to", description="Last date of the bars (YYYY-MM-DD or DD.MM.YYYY)"),
+        offset: int = Query(0, ge=0, description="Number of companies to skip"),
+        limit: Optional[int] = Query(None, ge=1, description="Maximum number of companies to return")
+    ) -> Response:
+        """
+        Return the content of mentioned_stock.json, served from the snapshot cache
         
-        try:
-            # Open and read the JSON file
-            with open(file_path, 'r') as file:
-                data = json.load(file)
-            return data
-        except FileNotFoundError:
-            return {"error": "Customer stocks file not found", "status": "error"}
-        except json.JSONDecodeError:
-            return {"error": "Invalid JSON format in customer stocks file", "status": "error"}
+        Without query parameters the whole document is returned, otherwise only the
+        selected companies and fields are serialized.
+        """
+        return await self._serve_snapshot(
+            request, MENTIONED_STOCK_FILE, "Mentioned stock",
+            company, fields, start, end, offset, limit
+        )
 
+    async def stream_stock_data(self, request: Request) -> StreamingResponse:
+        """
+        Push the changes of mentioned_stock.json as server-sent events
+        
+        Every "update" event holds the mentioned companies and the stock data of the
+        companies that changed. A "reset" event asks the client to reload the full
+        document from the mentioned stock endpoint, e.g. after it fell too far behind.
+        
+        Args:
+            request: FastAPI request object, a Last-Event-ID header resumes the stream
             
-                   
+        Returns:
+            StreamingResponse: The text/event-stream of updates
+        """
+        last_event_id = request.headers.get("last-event-id")
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_event_id = None
+        subscription, replayed = self.events.subscribe(last_event_id)
+        
+        async def stream():
+            try:
+                if not replayed:
+                    yield sse_event(self.events.last_id, "reset", b"{}")
+                while True:
+                    try:
+                        event = await subscription.get(timeout=KEEPALIVE_INTERVAL)
+                    except asyncio.TimeoutError:
+                        if await request.is_disconnected():
+                            return
+                        yield b": keepalive\n\n"
+                        continue
+                    if event is None:
+                        # Dropped for falling behind, the client reconnects and resynchronizes
+                        yield sse_event(self.events.last_id, "reset", b"{}")
+                        return
+                    yield sse_event(*event)
+            finally:
+                subscription.close()
+        
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
+
     async def get_customer_stocks(
         self, 
         request: Request,
-        company: str = Query("Apple", description="Company name to analyze")
-    ) -> Dict:
+        company: Optional[str] = Query(None, description="Comma separated companies to return, all if omitted"),
+        fields: str = Query("all", description="all, bars or summary"),
+        start: Optional[str] = Query(None, alias="from", description="First date of the bars (YYYY-MM-DD or DD.MM.YYYY)"),
+        end: Optional[str] = Query(None, alias="to", description="Last date of the bars (YYYY-MM-DD or DD.MM.YYYY)"),
+        offset: int = Query(0, ge=0, description="Number of companies to skip"),
+        limit: Optional[int] = Query(None, ge=1, description="Maximum number of companies to return")
+    ) -> Response:
         """
         Read and return the content of customer_stocks.json file
         
         Args:
             request: FastAPI request object
-            company: Company name to analyze (default: Apple)
+            company: Comma separated companies to return, names, aliases and tickers are accepted
+            fields: "all" for the stored data, "bars" for bars only, "summary" for the parsed metrics only
+            start: First date of the returned bars
+            end: Last date of the returned bars
+            offset: Number of selected companies to skip
+            limit: Maximum number of companies to return
             
         Returns:
-            Dict: The contents of the customer_stocks.json file
+            Response: The contents of the customer_stocks.json file, or the selected part of it
+        """
+        return await self._serve_snapshot(
+            request, CUSTOMER_STOCKS_FILE, "Customer stocks",
+            company, fields, start, end, offset, limit
+        )
+
+    async def get_bars(
+        self,
+        request: Request,
+        company: str = Query(..., description="Company or instrument name"),
+        start: Optional[str] = Query(None, alias="from", description="First date (YYYY-MM-DD or DD.MM.YYYY)"),
+        end: Optional[str] = Query(None, alias="to", description="Last date (YYYY-MM-DD or DD.MM.YYYY)"),
+        format: str = Query("json", description="json, msgpack or arrow")
+    ) -> Response:
         """
-        # Define the path to your JSON file
-        file_path = os.path.join(os.path.dirname(__file__), '../../data/customer_stocks.json')
+        Return the decoded OHLCV bars of a company from the columnar store
         
+        Args:
+            request: FastAPI request object
+            company: Company or instrument name
+            start: First date to include
+            end: Last date to include
+            format: json for columnar JSON, msgpack for raw little-endian columns, arrow for an Arrow IPC stream
+            
+        Returns:
+            Response: Columnar bars keyed by instrument
+        """
+        try:
+            bars = ohlcv_store.get(company, start, end)
+        except ValueError:
+            return JSONResponse({"error": "Invalid date format", "status": "error"})
+        if not bars:
+            return JSONResponse({"error": f"No stock data available for {company}", "status": "error"})
+        try:
+            body = encode_bars(company, bars, format)
+        except ValueError as e:
+            return JSONResponse({"error": str(e), "status": "error"})
+        return await encoded_response(request, EncodedBody(body), media_type=MEDIA_TYPES[format])
+
+    async def _serve_snapshot(
+        self,
+        request: Request,
+        file_path: str,
+        name: str,
+        company: Optional[str] = None,
+        fields: str = "all",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Response:
+        """
+        Serve a JSON file from the snapshot cache, answering 304 for unchanged versions.
+
+        The file is only re-parsed when its mtime/inode changes or when the producing
+        controller publishes a new version. Queries are answered from a company index
+        that is built once per version.
+        """
         try:
-            # Open and read the JSON file
-            with open(file_path, 'r') as file:
-                data = json.load(file)
-            return data
+            snapshot = await snapshot_cache.get(file_path)
         except FileNotFoundError:
-            return {"error": "Customer stocks file not found", "status": "error"}
+            return JSONResponse({"error": f"{name} file not found", "status": "error"})
         except json.JSONDecodeError:
-            return {"error": "Invalid JSON format in customer stocks file", "status": "error"}
+            return JSONResponse({"error": f"Invalid JSON format in {name.lower()} file", "status": "error"})
+
+        query = (company, fields, start, end, offset, limit)
+        if query == (None, "all", None, None, 0, None):
+            etag = snapshot.etag
+        else:
+            # The response only changes with the snapshot version and the query
+            etag = '"%s"' % hashlib.blake2b(repr((snapshot.etag, query)).encode(), digest_size=16).hexdigest()
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={**headers, "Vary": "Accept-Encoding"})
+        if etag == snapshot.etag:
+            # Compressed variants are kept with the snapshot version they were built from
+            body = snapshot.derived("encoded", lambda document: EncodedBody(snapshot.body))
+            return await encoded_response(request, body, headers)
 
+        body = self.query_bodies.get(etag)
+        if body is None:
+            index = snapshot.peek("index")
+            if index is None:
+                index = await asyncio.to_thread(snapshot.derived, "index", StockDocumentIndex)
+            companies = [part for part in company.split(",") if part.strip()] if company else None
+            try:
+                result = index.query(companies, fields, start, end, offset, limit)
+            except ValueError as e:
+                return JSONResponse({"error": str(e), "status": "error"})
+            body = self.query_bodies.put(etag, EncodedBody(dumps(result)))
+        return await encoded_response(request, body, headers)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from api.constants import APIEndpoints
+from controllers.service_initializer import ServiceInitializer
+
+
+class Readiness:
+
+    def __init__(self, service_initializer: ServiceInitializer) -> None:
+        self.service_initializer = service_initializer
+    
+    def add_api_routes(self, router: APIRouter) -> None:
+        router.add_api_route(APIEndpoints.READINESS.value, self.get, methods=['GET'])
+    
+    async def get(self, request: Request) -> JSONResponse:
+        """
+        Report whether the warm-up finished, with the state of each step and the cache warmth
+        
+        Returns:
+            JSONResponse: 200 once ready, 503 while warming up or if a warm-up step failed
+        """
+        report = self.service_initializer.readiness()
+        return JSONResponse(report, status_code=200 if self.service_initializer.ready else 503)
@@ -1,28 +1,74 @@
 import aiohttp
 import asyncio
 import json
-import pandas as pd
 from urllib.parse import quote
 
+from clients.response_cache import ResponseCache
+
+# Connection pool settings shared by every user of the process-wide client
+CONNECTION_LIMIT = 100
+CONNECTION_LIMIT_PER_HOST = 20
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 30
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=60, connect=10, sock_read=50)
+
+# Seconds a response stays cached per endpoint
+RESPONSE_TTLS = {
+    "ohlcv": 300,
+    "companydatasearch": 3600,
+    "summary": 600,
+    "llm": 300,
+}
+RESPONSE_CACHE_SIZE = 512
+
+
 class IDChatClient:
     """Simple client for interacting with the IDChat Agent API asynchronously."""
     
+    _shared = None
+    
     def __init__(self):
         self.base_url = "https://idchat-api-containerapp01-dev.orangepebble-16234c4b.switzerlandnorth.azurecontainerapps.io"
         self.session = None
+        self.cache = ResponseCache(ttls=RESPONSE_TTLS, max_entries=RESPONSE_CACHE_SIZE)
+    
+    @classmethod
+    def shared(cls) -> "IDChatClient":
+        """Return the process-wide client whose connection pool is shared by all controllers."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+    
+    @classmethod
+    async def close_shared(cls):
+        """Close the process-wide client, called on application shutdown."""
+        if cls._shared is not None:
+            await cls._shared.close()
+            cls._shared = None
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        await self.ensure_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        await self.close()
     
     async def ensure_session(self):
-        """Ensure a session exists."""
-        if self.session is None:
-            self.session = aiohttp.ClientSession()
+        """Ensure a session with a pooled, keep-alive connector exists."""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=CONNECTION_LIMIT,
+                limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT)
+    
+    async def close(self):
+        """Close the session and its connection pool."""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
     
     async def query(self, query_str):
         """Query the graph with a natural language query."""
@@ -40,36 +86,40 @@ class IDChatClient:
     
     async def ohlcv(self, query_str, first="01.01.2024", last=None):
         """Get historical price data."""
-        await self.ensure_session()
         url = f"{self.base_url}/ohlcv?query={quote(query_str)}&first={quote(first)}"
         if last:
             url = f"{url}&last={quote(last)}"
-        async with self.session.post(url) as response:
-            return await response.json()
+        return await self._cached_post("ohlcv", url, query_str, first, last)
     
     async def company_data_search(self, query_str):
         """Get information about one or more companies."""
-        await self.ensure_session()
-        url = f"{self.base_url}/companydatasearch?query={quote("company:{query_str}")}"
-        async with self.session.post(url) as response:
-            return await response.json()
+        url = f"{self.base_url}/companydatasearch?query={quote('company:' + query_str)}"
+        return await self._cached_post("companydatasearch", url, query_str)
     
     async def summary(self, query_str):
         """Get basic information about a company."""
-        await self.ensure_session()
         url = f"{self.base_url}/summary?query={quote(query_str)}"
-        async with self.session.post(url) as response:
-            return await response.json()
+        return await self._cached_post("summary", url, query_str)
     
     async def llm(self, query_str):
         """Query OpenAI 4o model."""
-        await self.ensure_session()
         url = f"{self.base_url}/llm?query={quote(query_str)}"
+        return await self._cached_post("llm", url, query_str)
+    
+    async def _post(self, url):
+        await self.ensure_session()
         async with self.session.post(url) as response:
             return await response.json()
     
+    async def _cached_post(self, endpoint, url, query_str, first=None, last=None):
+        """Post through the response cache, sharing one upstream call between identical requests."""
+        key = self.cache.key(endpoint, query_str, first, last)
+        return await self.cache.get_or_fetch(key, lambda: self._post(url))
+    
     def parse_table_data(self, response):
         """Helper method to parse table data from a response."""
+        # pandas is only needed here and takes a large part of the process start to import
+        import pandas as pd
         try:
             return pd.read_json(json.loads(response['messages'][2]['item'])['data'][0])
         except (KeyError, IndexError, json.JSONDecodeError):
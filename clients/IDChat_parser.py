@@ -0,0 +1,233 @@
+import json
+import re
+from collections import OrderedDict
+from functools import cached_property
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from shared.ohlcv_store import parse_number
+
+
+_EXCHANGE_PATTERN = re.compile(r'^\s*(?P<code>[^-"]+?)\s*-\s*"(?P<name>[^"]*)"')
+
+
+class Listing(NamedTuple):
+    """One row of a company_data_search result."""
+    name: Optional[str]
+    isin: Optional[str]
+    exchange_code: Optional[str]
+    exchange: Optional[str]
+    previous_ask: float
+    recent_ask: float
+
+
+class Summary(NamedTuple):
+    """The instrument described by a summary result."""
+    name: Optional[str]
+    valor: Optional[str]
+    ticker: Optional[str]
+    isin: Optional[str]
+    outstanding_securities: float
+    open: float
+    close: float
+    high: float
+    low: float
+    vol: float
+
+
+def _decode_object(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Decode the JSON string in the "object" field of an IDChat response."""
+    payload = response.get("object") if isinstance(response, dict) else None
+    if isinstance(payload, str):
+        try:
+            payload = json.loads(payload)
+        except json.JSONDecodeError:
+            return None
+    return payload if isinstance(payload, dict) else None
+
+
+def _decode_frames(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Decode the list of JSON encoded frames in the object data of an IDChat response."""
+    payload = _decode_object(response)
+    if payload is None:
+        return []
+    frames = payload.get("data")
+    if not isinstance(frames, list):
+        frames = [frames]
+    decoded = []
+    for frame in frames:
+        if isinstance(frame, str):
+            try:
+                frame = json.loads(frame)
+            except json.JSONDecodeError:
+                continue
+        if isinstance(frame, dict):
+            decoded.append(frame)
+    return decoded
+
+
+def parse_markdown_table(text: str) -> List[Dict[str, str]]:
+    """
+    Parse the first markdown table in text into rows keyed by column header.
+
+    Args:
+        text: Text containing a table such as "| Name | ISIN |\n|:--|:--|\n| A | B |"
+
+    Returns:
+        list: One dict per table row, empty if text holds no table
+    """
+    rows = []
+    header = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line.startswith("|"):
+            if header is not None:
+                break
+            continue
+        cells = [cell.strip() for cell in line.strip("|").split("|")]
+        if header is None:
+            header = cells
+        elif all(set(cell) <= set(":-") for cell in cells):
+            continue
+        else:
+            rows.append(dict(zip(header, cells)))
+    return rows
+
+
+def _listing_from_row(row: Dict[str, Any]) -> Listing:
+    exchange = row.get("BC")
+    match = _EXCHANGE_PATTERN.match(exchange) if isinstance(exchange, str) else None
+    return Listing(
+        name=row.get("Name"),
+        isin=row.get("ISIN"),
+        exchange_code=match.group("code") if match else None,
+        exchange=match.group("name") if match else exchange,
+        previous_ask=parse_number(row.get("Previous Day Last Ask")),
+        recent_ask=parse_number(row.get("Most Recent Ask"))
+    )
+
+
+def parse_listings(response: Optional[Dict[str, Any]]) -> List[Listing]:
+    """
+    Parse a company_data_search response into listings.
+
+    The structured frames in "object" are used when present, the markdown table
+    in "message" otherwise.
+    """
+    if not response:
+        return []
+    listings = []
+    for frame in _decode_frames(response):
+        # Frames are column oriented: {"Name": {"0": ...}, "ISIN": {"0": ...}}
+        columns = {key: value for key, value in frame.items() if isinstance(value, dict)}
+        row_ids = next(iter(columns.values()), {}).keys()
+        for row_id in row_ids:
+            listings.append(_listing_from_row({key: column.get(row_id) for key, column in columns.items()}))
+    if not listings and isinstance(response.get("message"), str):
+        listings = [_listing_from_row(row) for row in parse_markdown_table(response["message"])]
+    return listings
+
+
+def parse_summary(response: Optional[Dict[str, Any]]) -> Optional[Summary]:
+    """Parse a summary response into the described instrument."""
+    if not response:
+        return None
+    for frame in _decode_frames(response):
+        for name, fields in frame.items():
+            if not isinstance(fields, dict):
+                continue
+            return Summary(
+                name=fields.get("Name", name),
+                valor=fields.get("Valor number"),
+                ticker=fields.get("Ticker symbol"),
+                isin=fields.get("ISIN"),
+                outstanding_securities=parse_number(fields.get("Outstanding Securities")),
+                open=parse_number(fields.get("open")),
+                close=parse_number(fields.get("close")),
+                high=parse_number(fields.get("high")),
+                low=parse_number(fields.get("low")),
+                vol=parse_number(fields.get("vol"))
+            )
+    return None
+
+
+def _finite(value: float) -> Optional[float]:
+    return value if value == value else None
+
+
+class CompanyRecord:
+    """
+    Typed view of a company's company_data_search and summary responses.
+
+    Responses are only parsed when a field is first accessed and then kept.
+    """
+
+    def __init__(self, company_data: Optional[Dict[str, Any]] = None, summary: Optional[Dict[str, Any]] = None):
+        self.company_data = company_data
+        self.summary_data = summary
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> "CompanyRecord":
+        """Build a record from {"company_data": ..., "summary": ...} or a bare company_data response."""
+        if isinstance(data, dict) and ("company_data" in data or "summary" in data):
+            return cls(data.get("company_data"), data.get("summary"))
+        return cls(company_data=data)
+
+    @cached_property
+    def listings(self) -> List[Listing]:
+        return parse_listings(self.company_data)
+
+    @cached_property
+    def summary(self) -> Optional[Summary]:
+        return parse_summary(self.summary_data)
+
+    @cached_property
+    def metrics(self) -> Dict[str, Any]:
+        """Precomputed metrics of the company, None where the responses do not provide them."""
+        summary = self.summary
+        listing = self.listings[0] if self.listings else None
+        close = summary.close if summary else float("nan")
+        outstanding = summary.outstanding_securities if summary else float("nan")
+        recent_ask = listing.recent_ask if listing else float("nan")
+        price = close if close == close else recent_ask
+        return {
+            "name": summary.name if summary else listing.name if listing else None,
+            "isin": summary.isin if summary and summary.isin else listing.isin if listing else None,
+            "ticker": summary.ticker if summary else None,
+            "exchange": listing.exchange if listing else None,
+            "price": _finite(price),
+            "previous_ask": _finite(listing.previous_ask) if listing else None,
+            "most_recent_ask": _finite(recent_ask),
+            "volume": _finite(summary.vol) if summary else None,
+            "outstanding_securities": _finite(outstanding),
+            "market_cap": _finite(outstanding * price),
+            "listings": len(self.listings),
+        }
+
+    def metric(self, name: str) -> Any:
+        return self.metrics.get(name)
+
+
+class RecordCache:
+    """Keeps the parsed record of each response object, so a cached response is parsed once."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._records: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def get(self, data: Dict[str, Any]) -> CompanyRecord:
+        """Return the record of data, parsing it only if this object was not seen before."""
+        if isinstance(data, dict) and ("company_data" in data or "summary" in data):
+            parts = (data.get("company_data"), data.get("summary"))
+        else:
+            parts = (data, None)
+        key = tuple(id(part) for part in parts)
+        entry = self._records.get(key)
+        # The responses are kept in the entry, so their ids can not be reused while cached
+        if entry is not None and all(cached is part for cached, part in zip(entry[0], parts)):
+            self._records.move_to_end(key)
+            return entry[1]
+        record = CompanyRecord(*parts)
+        self._records[key] = (parts, record)
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+        return record
@@ -1,31 +1,126 @@
 
-import boto3
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
 from botocore.exceptions import ClientError
 import json
 
 
 class AWSSecretClient:
+    """
+    Secrets Manager client that caches the parsed secrets.
 
+    Each secret is fetched once and kept for ttl seconds. Secrets read during
+    the last refresh_ahead seconds of their lifetime are refreshed in a
+    background thread, so callers keep getting the cached value meanwhile.
+    """
 
-    def get_secret(self, secret_name: str, secret_key: str, region_name: str) -> str:
+    def __init__(self, client: Any = None, ttl: float = 3600.0, refresh_ahead: float = 300.0):
+        """
+        Args:
+            client: A boto3 secretsmanager client used for every region, created per region if omitted
+            ttl: Seconds a fetched secret is used
+            refresh_ahead: Seconds before expiry from which a read triggers a background refresh
+        """
+        self._client = client
+        self._clients: Dict[str, Any] = {}
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl)
+        self._secrets: Dict[Tuple[str, str], Tuple[Dict[str, Any], float]] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
 
-        # Create a Secrets Manager client
-        session = boto3.session.Session()
-        client = session.client(
-            service_name='secretsmanager',
-            region_name=region_name
-        )
+    def client(self, region_name: str):
+        """Return the Secrets Manager client of a region, created on first use."""
+        if self._client is not None:
+            return self._client
+        with self._lock:
+            client = self._clients.get(region_name)
+            if client is None:
+                import boto3
+                client = boto3.session.Session().client(
+                    service_name='secretsmanager',
+                    region_name=region_name
+                )
+                self._clients[region_name] = client
+            return client
 
+    def _fetch(self, secret_name: str, region_name: str) -> Dict[str, Any]:
         try:
-            get_secret_value_response = client.get_secret_value(
+            get_secret_value_response = self.client(region_name).get_secret_value(
                 SecretId=secret_name
             )
         except ClientError as e:
             raise e
-        secret_string_parsed = json.loads(get_secret_value_response['SecretString'])
-        secret = secret_string_parsed[secret_key]
+        secret = json.loads(get_secret_value_response['SecretString'])
+        with self._lock:
+            self._secrets[(region_name, secret_name)] = (secret, time.monotonic())
+        return secret
+
+    def _refresh(self, key: Tuple[str, str]) -> None:
+        region_name, secret_name = key
+        try:
+            self._fetch(secret_name, region_name)
+        except Exception:
+            # The cached secret stays in use until it expires
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _cached(self, secret_name: str, region_name: str) -> Optional[Dict[str, Any]]:
+        """Return the cached secret if it has not expired, starting a refresh if it expires soon."""
+        key = (region_name, secret_name)
+        with self._lock:
+            entry = self._secrets.get(key)
+            if entry is None:
+                return None
+            secret, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age >= self.ttl:
+                return None
+            if age >= self.ttl - self.refresh_ahead and key not in self._refreshing:
+                self._refreshing.add(key)
+                threading.Thread(target=self._refresh, args=(key,), daemon=True).start()
         return secret
 
+    def get_secrets(self, secret_name: str, region_name: str) -> Dict[str, Any]:
+        """Return all keys of a secret, fetching it at most once at a time."""
+        secret = self._cached(secret_name, region_name)
+        if secret is not None:
+            return secret
+        key = (region_name, secret_name)
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            # Another caller may have fetched it while this one waited
+            secret = self._cached(secret_name, region_name)
+            if secret is None:
+                secret = self._fetch(secret_name, region_name)
+        return secret
+
+    def get_secret(self, secret_name: str, secret_key: str, region_name: str) -> str:
+        return self.get_secrets(secret_name, region_name)[secret_key]
+
+    async def get_secret_async(self, secret_name: str, secret_key: str, region_name: str) -> str:
+        """Like get_secret, fetching off the event loop if the secret is not cached."""
+        secret = self._cached(secret_name, region_name)
+        if secret is None:
+            secret = await asyncio.to_thread(self.get_secrets, secret_name, region_name)
+        return secret[secret_key]
+
+    def invalidate(self, secret_name: Optional[str] = None) -> None:
+        """Drop a cached secret, or all of them, e.g. after a rotation."""
+        with self._lock:
+            if secret_name is None:
+                self._secrets.clear()
+            else:
+                for key in [key for key in self._secrets if key[1] == secret_name]:
+                    del self._secrets[key]
+
 
 if __name__ == '__main__':
     secret_client = AWSSecretClient()
@@ -0,0 +1,273 @@
+import asyncio
+import atexit
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, List, Optional, Tuple
+
+
+# Limits of a single PutLogEvents call
+MAX_BATCH_EVENTS = 10000
+MAX_BATCH_BYTES = 1048576
+EVENT_OVERHEAD_BYTES = 26
+MAX_EVENT_BYTES = 256 * 1024 - EVENT_OVERHEAD_BYTES
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the logging thread.
+
+    When the queue is more than sample_above full, records below WARNING are
+    only kept one in sample_every. When it is full, the policy decides whether
+    the new record ("drop_newest") or the oldest queued one ("drop_oldest") is
+    dropped.
+    """
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        policy: str = "drop_newest",
+        sample_above: float = 0.8,
+        sample_every: int = 10
+    ):
+        if policy not in ("drop_newest", "drop_oldest"):
+            raise ValueError(f"Unknown drop policy: {policy}")
+        super().__init__(log_queue)
+        self.policy = policy
+        self.sample_threshold = int(log_queue.maxsize * sample_above) if log_queue.maxsize else 0
+        self.sample_every = sample_every
+        self.dropped = 0
+        self._sampled = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.sample_threshold and record.levelno < logging.WARNING and self.queue.qsize() >= self.sample_threshold:
+            self._sampled += 1
+            if self._sampled % self.sample_every:
+                self.dropped += 1
+                return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.policy == "drop_newest":
+                self.dropped += 1
+                return
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+
+
+class CloudWatchBatchHandler(logging.Handler):
+    """
+    Handler that collects formatted records and ships them with PutLogEvents
+    from a dedicated thread.
+
+    A batch is sent when it holds batch_size events or batch_bytes bytes, or
+    flush_interval seconds after its first event, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        log_group: str,
+        stream_name: str,
+        logs_client: Any = None,
+        batch_size: int = 1000,
+        batch_bytes: int = MAX_BATCH_BYTES,
+        flush_interval: float = 5.0,
+        create_log_group: bool = True
+    ):
+        super().__init__()
+        self.log_group = log_group
+        self.stream_name = stream_name
+        self._logs_client = logs_client
+        self.batch_size = min(batch_size, MAX_BATCH_EVENTS)
+        self.batch_bytes = min(batch_bytes, MAX_BATCH_BYTES)
+        self.flush_interval = flush_interval
+        self.create_log_group = create_log_group
+        self._events: List[Tuple[int, str]] = []
+        self._size = 0
+        self._first_event_at: Optional[float] = None
+        self._condition = threading.Condition()
+        self._closing = False
+        self._stream_ready = False
+        self._thread = threading.Thread(target=self._ship_loop, name="cloudwatch-shipper", daemon=True)
+        self._thread.start()
+
+    @property
+    def logs_client(self):
+        # Built by the shipper thread on first use, so importing boto3 stays off the process start
+        if self._logs_client is None:
+            import boto3
+            self._logs_client = boto3.client('logs')
+        return self._logs_client
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            message = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        encoded = message.encode('utf-8')
+        if len(encoded) > MAX_EVENT_BYTES:
+            message = encoded[:MAX_EVENT_BYTES].decode('utf-8', errors='ignore')
+        size = len(message.encode('utf-8')) + EVENT_OVERHEAD_BYTES
+        with self._condition:
+            if self._size + size > self.batch_bytes:
+                # Mark the batch as due and let the shipper take it before adding to it
+                self._first_event_at = time.monotonic() - self.flush_interval
+                self._condition.notify_all()
+                while self._events and not self._closing:
+                    self._condition.wait(self.flush_interval)
+            self._events.append((int(record.created * 1000), message))
+            self._size += size
+            if self._first_event_at is None:
+                self._first_event_at = time.monotonic()
+            if len(self._events) >= self.batch_size:
+                self._condition.notify()
+
+    def _take_batch(self) -> List[Tuple[int, str]]:
+        events, self._events, self._size, self._first_event_at = self._events, [], 0, None
+        self._condition.notify_all()
+        return events
+
+    def _ship_loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closing:
+                    if self._events and (
+                        len(self._events) >= self.batch_size
+                        or self._size >= self.batch_bytes
+                        or time.monotonic() - self._first_event_at >= self.flush_interval
+                    ):
+                        break
+                    timeout = self.flush_interval
+                    if self._first_event_at is not None:
+                        timeout = max(0.0, self._first_event_at + self.flush_interval - time.monotonic())
+                    self._condition.wait(timeout)
+                events = self._take_batch()
+                closing = self._closing
+            if events:
+                self._put_events(events)
+            if closing:
+                return
+
+    def _ensure_stream(self) -> None:
+        if self._stream_ready:
+            return
+        exists = self.logs_client.exceptions.ResourceAlreadyExistsException
+        if self.create_log_group:
+            try:
+                self.logs_client.create_log_group(logGroupName=self.log_group)
+            except exists:
+                pass
+        try:
+            self.logs_client.create_log_stream(logGroupName=self.log_group, logStreamName=self.stream_name)
+        except exists:
+            pass
+        self._stream_ready = True
+
+    def _put_events(self, events: List[Tuple[int, str]]) -> None:
+        # PutLogEvents requires chronological order
+        events.sort(key=lambda event: event[0])
+        try:
+            self._ensure_stream()
+            self.logs_client.put_log_events(
+                logGroupName=self.log_group,
+                logStreamName=self.stream_name,
+                logEvents=[{"timestamp": timestamp, "message": message} for timestamp, message in events]
+            )
+        except Exception as e:
+            # Logging the failure would feed it back into this handler
+            print(f"Dropped {len(events)} CloudWatch log events: {e}", file=sys.stderr)
+
+    def flush(self) -> None:
+        """Ask the shipper to send the current batch without waiting for it."""
+        with self._condition:
+            if self._events:
+                self._first_event_at = time.monotonic() - self.flush_interval
+                self._condition.notify_all()
+
+    def close(self) -> None:
+        """Ship the remaining events and stop the shipping thread."""
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        self._thread.join(timeout=self.flush_interval + 10)
+        super().close()
+
+
+class CloudWatchLogging:
+    """
+    Non-blocking CloudWatch logging of a logger.
+
+    Records are put on a bounded queue by the logging thread, a QueueListener
+    thread formats them into batches and a shipping thread sends the batches.
+    """
+
+    def __init__(
+        self,
+        log_group: str,
+        stream_name: str,
+        formatter: Optional[logging.Formatter] = None,
+        level: int = logging.INFO,
+        max_queue_size: int = 10000,
+        policy: str = "drop_newest",
+        logs_client: Any = None,
+        **batch_options
+    ):
+        """
+        Args:
+            log_group: CloudWatch log group
+            stream_name: CloudWatch log stream, created if it does not exist
+            formatter: Formatter of the shipped messages
+            level: Minimum level of shipped records
+            max_queue_size: Maximum number of records waiting to be formatted
+            policy: What to drop when the queue is full, "drop_newest" or "drop_oldest"
+            logs_client: A boto3 CloudWatch Logs client, created if omitted
+            batch_options: batch_size, batch_bytes and flush_interval of CloudWatchBatchHandler
+        """
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self.handler = BoundedQueueHandler(self.queue, policy=policy)
+        self.handler.setLevel(level)
+        self.shipper = CloudWatchBatchHandler(log_group, stream_name, logs_client=logs_client, **batch_options)
+        self.shipper.setLevel(level)
+        if formatter is not None:
+            self.shipper.setFormatter(formatter)
+        self.listener = QueueListener(self.queue, self.shipper, respect_handler_level=True)
+        self._loggers: List[logging.Logger] = []
+        self._started = False
+
+    def attach(self, logger: logging.Logger) -> "CloudWatchLogging":
+        """Start shipping and add the queue handler to a logger."""
+        if not self._started:
+            self.listener.start()
+            atexit.register(self.stop)
+            self._started = True
+        logger.addHandler(self.handler)
+        self._loggers.append(logger)
+        return self
+
+    def stop(self) -> None:
+        """Detach from the loggers, drain the queue and ship the remaining events."""
+        if not self._started:
+            return
+        self._started = False
+        for logger in self._loggers:
+            logger.removeHandler(self.handler)
+        self.listener.stop()
+        if self.handler.dropped:
+            print(f"Dropped {self.handler.dropped} log records under load", file=sys.stderr)
+        self.shipper.close()
+        atexit.unregister(self.stop)
+
+    async def shutdown(self) -> None:
+        """Stop off the event loop, for use as a shutdown event handler."""
+        await asyncio.to_thread(self.stop)
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class ResponseCache:
+    """
+    LRU cache with per-endpoint TTLs that coalesces concurrent identical requests.
+
+    Cached responses are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 60.0, max_entries: int = 512):
+        """
+        Args:
+            ttls: Time to live in seconds per endpoint
+            default_ttl: Time to live for endpoints without an entry in ttls
+            max_entries: Maximum number of cached responses before the least recently used is evicted
+        """
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def normalize(query_str: Optional[str]) -> Optional[str]:
+        """Normalize a query so that differently spaced or cased queries share an entry."""
+        if query_str is None:
+            return None
+        return " ".join(str(query_str).split()).casefold()
+
+    def key(self, endpoint: str, query_str: Optional[str], first: Optional[str] = None, last: Optional[str] = None) -> tuple:
+        return (endpoint, self.normalize(query_str), first, last)
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: Hashable, endpoint: str, value: Any) -> None:
+        ttl = self.ttls.get(endpoint, self.default_ttl)
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, key: tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached response for key, or fetch it once for all concurrent callers.
+
+        Args:
+            key: Cache key as returned by key(), its first element is the endpoint
+            fetch: Coroutine function performing the upstream call
+
+        Returns:
+            Any: The response, failures are raised to every waiter and not cached
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._complete(key, done))
+        # Shield so a cancelled waiter does not cancel the call the others are waiting on
+        return await asyncio.shield(task)
+
+    def _complete(self, key: tuple, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._store(key, key[0], task.result())
+
+    def invalidate(self, endpoint: Optional[str] = None) -> None:
+        """Drop all cached responses, or only those of one endpoint."""
+        if endpoint is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == endpoint]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
@@ -1,41 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import boto3
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional
+import hashlib
+import threading
 import os
 
+if TYPE_CHECKING:
+    from boto3.s3.transfer import TransferConfig
+
+MB = 1024 * 1024
+
+# Files larger than MULTIPART_THRESHOLD are transferred in MULTIPART_CHUNKSIZE parts,
+# MULTIPART_CONCURRENCY parts at a time
+MULTIPART_THRESHOLD = 8 * MB
+MULTIPART_CHUNKSIZE = 8 * MB
+MULTIPART_CONCURRENCY = 4
+# Number of files of a folder transferred at the same time
+FOLDER_CONCURRENCY = 16
+
+
+def file_etag(path: Path, chunk_size: int, parts: int = 0) -> str:
+    """
+    Compute the ETag S3 assigns to a file uploaded without server-side encryption by KMS.
+
+    Args:
+        path: The local file
+        chunk_size: Part size used for multipart uploads
+        parts: Number of parts of the remote object, 0 if it was uploaded in one piece
+
+    Returns:
+        str: The quoted ETag, "<md5>" for single part and "<md5 of part md5s>-<parts>" for multipart uploads
+    """
+    with open(path, 'rb') as file:
+        if not parts:
+            digest = hashlib.md5()
+            for block in iter(lambda: file.read(MB), b''):
+                digest.update(block)
+            return f'"{digest.hexdigest()}"'
+        part_digests = []
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            part_digests.append(hashlib.md5(chunk).digest())
+    return f'"{hashlib.md5(b"".join(part_digests)).hexdigest()}-{len(part_digests)}"'
+
+
 class S3FileStore:
 
-    def __init__(self):
+    def __init__(
+        self,
+        s3_client: Any = None,
+        transfer_config: Optional["TransferConfig"] = None,
+        max_workers: int = FOLDER_CONCURRENCY
+    ):
         """
         This method should initialize the filestore client with the given config.
-        - config: A dictionary containing the necessary configuration to initialize the filestore client.
-            - aws_access_key_id: The access key for the AWS account.
-            - aws_secret_access_key: The secret access key for the AWS account.
+        - s3_client: A boto3 S3 client, created from the default session on first use if omitted.
+        - transfer_config: Multipart threshold, part size and part concurrency of single transfers.
+        - max_workers: Number of files transferred in parallel by the folder operations.
         """
-        boto3.setup_default_session()
-        self._s3_client = boto3.client('s3')
+        self._client = s3_client
+        self._transfer_config = transfer_config
+        self._lock = threading.Lock()
+        self.max_workers = max_workers
+
+    @property
+    def _s3_client(self):
+        # boto3 is imported and the client built on first use, keeping both out of the process start
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import boto3
+                    boto3.setup_default_session()
+                    self._client = boto3.client('s3')
+        return self._client
+
+    @property
+    def transfer_config(self) -> "TransferConfig":
+        if self._transfer_config is None:
+            from boto3.s3.transfer import TransferConfig
+            self._transfer_config = TransferConfig(
+                multipart_threshold=MULTIPART_THRESHOLD,
+                multipart_chunksize=MULTIPART_CHUNKSIZE,
+                max_concurrency=MULTIPART_CONCURRENCY
+            )
+        return self._transfer_config
 
     def save(self, localpath: Path, bucket_name: str, file_name: str, **kwargs):
-        self._s3_client.upload_file(localpath, bucket_name, file_name)
+        self._s3_client.upload_file(str(localpath), bucket_name, file_name, Config=self.transfer_config)
 
 
     def load(self, localpath: Path, bucket_name: str, file_name: str, **kwargs):
         if os.path.exists(localpath):
             return
-        self._s3_client.download_file(bucket_name, file_name, localpath)
-            
-    
-    def load_folder(self, localpath: Path, bucket_name: str, folder_name: str, **kwargs):
-        files = self._s3_client.list_objects(Bucket=bucket_name, Prefix=folder_name)
+        self._s3_client.download_file(bucket_name, file_name, str(localpath), Config=self.transfer_config)
+
+    def delete(self, bucket_name: str, file_name: str, **kwargs):
+        self._s3_client.delete_object(Bucket=bucket_name, Key=file_name)
+
+    def list_objects(self, bucket_name: str, prefix: str) -> Iterator[Dict[str, Any]]:
+        """Yield every object under a prefix, following the pagination of list_objects_v2."""
+        paginator = self._s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            yield from page.get('Contents', [])
+
+    def is_current(self, localpath: Path, remote: Dict[str, Any]) -> bool:
+        """
+        Check whether a local file has the same content as a listed object.
+
+        Sizes are compared first, the ETag is only computed if they match.
+        """
+        try:
+            if os.path.getsize(localpath) != remote['Size']:
+                return False
+        except OSError:
+            return False
+        etag = remote.get('ETag', '')
+        parts = int(etag.strip('"').rpartition('-')[2]) if '-' in etag else 0
+        return file_etag(localpath, self.transfer_config.multipart_chunksize, parts) == etag
+
+    def _transfer_all(self, transfers) -> Dict[str, int]:
+        """Run (skip check, transfer) pairs in the thread pool and count the outcomes."""
+        stats = {"transferred": 0, "skipped": 0}
+
+        def run(is_current, transfer):
+            if is_current():
+                return "skipped"
+            transfer()
+            return "transferred"
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(run, is_current, transfer) for is_current, transfer in transfers]
+            for future in futures:
+                stats[future.result()] += 1
+        return stats
+
+    def load_folder(self, localpath: Path, bucket_name: str, folder_name: str, **kwargs) -> Dict[str, int]:
+        """
+        Download all objects under a folder in parallel, skipping files that are already up to date.
+
+        Returns:
+            dict: Number of transferred and skipped files
+        """
+        localpath = Path(localpath)
         os.makedirs(localpath, exist_ok=True)
-        for file in files['Contents']:
-            file_key = file['Key']
+        transfers = []
+        for remote in self.list_objects(bucket_name, folder_name):
+            file_key = remote['Key']
+            if file_key.endswith('/'):
+                continue
             local_file_path = localpath / file_key.split('/')[-1]
-            self._s3_client.download_file(bucket_name, file_key, local_file_path)
+            transfers.append((
+                lambda remote=remote, path=local_file_path: self.is_current(path, remote),
+                lambda key=file_key, path=local_file_path: self._s3_client.download_file(
+                    bucket_name, key, str(path), Config=self.transfer_config
+                )
+            ))
+        return self._transfer_all(transfers)
+
 
+    def save_folder(self, localpath: Path, bucket_name: str, folder_name: str, **kwargs) -> Dict[str, int]:
+        """
+        Upload all files of a folder in parallel, skipping objects that are already up to date.
 
-    def save_folder(self, localpath: Path, bucket_name: str, folder_name: str, **kwargs):
-        for file in localpath.iterdir():
-            self._s3_client.upload_file(file, bucket_name, f"{folder_name}/{file.name}")
+        Returns:
+            dict: Number of transferred and skipped files
+        """
+        remote_objects = {remote['Key']: remote for remote in self.list_objects(bucket_name, f"{folder_name}/")}
+        transfers = []
+        for file in Path(localpath).iterdir():
+            if not file.is_file():
+                continue
+            file_key = f"{folder_name}/{file.name}"
+            remote = remote_objects.get(file_key)
+            transfers.append((
+                lambda remote=remote, path=file: remote is not None and self.is_current(path, remote),
+                lambda key=file_key, path=file: self._s3_client.upload_file(
+                    str(path), bucket_name, key, Config=self.transfer_config
+                )
+            ))
+        return self._transfer_all(transfers)
 
 
 
@@ -47,4 +189,3 @@ if __name__ == '__main__':
 
     s3_filestore = S3FileStore()
     s3_filestore.save(Path('./test.txt'), S3_BUCKET_NAME, f'{ENV}/test.txt')
-
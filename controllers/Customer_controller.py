@@ -3,13 +3,15 @@ import os
 import logging
 from pathlib import Path
 from controllers.IDChat_controller import IDChatController
+from shared.json_store import json_persister
 
 class CustomerController:
-    def __init__(self):
+    def __init__(self, idchat_controller=None):
         self.customers_data = None
+        self.customers_by_id = {}
         self.file_path = os.path.join(os.path.dirname(__file__), '../data/customer.json')
         self.stocks_file_path = os.path.join(os.path.dirname(__file__), '../data/customer_stocks.json')
-        self.idchat_controller = None
+        self.idchat_controller = idchat_controller
         
     async def initialize(self, customer_id="c007"):
         """
@@ -17,14 +19,18 @@ class CustomerController:
         
         Args:
             customer_id (str): The ID of the customer to process (default: c007)
+            
+        Returns:
+            bool: True if the stocks of the customer were saved, False otherwise
         """
         try:
             await self.load_customer_data()
-            # Initialize IDChatController
-            self.idchat_controller = IDChatController()
+            # Initialize IDChatController, unless a shared one was passed in
+            if self.idchat_controller is None:
+                self.idchat_controller = IDChatController()
             await self.idchat_controller.initialize()
             # Call method with the provided customer ID
-            await self.save_customer_stocks(customer_id)
+            return await self.save_customer_stocks(customer_id)
         except Exception as e:
             logging.error(f"Failed to initialize CustomerController: {str(e)}")
             raise
@@ -34,6 +40,9 @@ class CustomerController:
         try:
             with open(self.file_path, 'r') as file:
                 self.customers_data = json.load(file)
+            self.customers_by_id = {
+                customer.get("id"): customer for customer in self.customers_data.get("customers", [])
+            }
             logging.info("Customer data loaded successfully")
         except Exception as e:
             logging.error(f"Error loading customer data: {str(e)}")
@@ -44,11 +53,7 @@ class CustomerController:
         if not self.customers_data:
             raise RuntimeError("Customer data not loaded. Initialize controller first.")
             
-        for customer in self.customers_data.get("customers", []):
-            if customer.get("id") == customer_id:
-                return customer
-                
-        return None
+        return self.customers_by_id.get(customer_id)
     
     def get_customer_companies(self, customer_id):
         """
@@ -71,7 +76,7 @@ class CustomerController:
             
         return companies
     
-    def save_customer_companies_to_json(self, customer_id):
+    async def save_customer_companies_to_json(self, customer_id):
         """
         Save a customer's invested companies to a JSON file
         
@@ -95,12 +100,8 @@ class CustomerController:
                 "companies": companies
             }
             
-            # Ensure the directory exists
-            os.makedirs(os.path.dirname(self.stocks_file_path), exist_ok=True)
-            
-            # Write to JSON file
-            with open(self.stocks_file_path, 'w') as file:
-                json.dump(data, file, indent=2)
+            # Write to JSON file off the event loop
+            await json_persister.save(self.stocks_file_path, data)
                 
             logging.info(f"Successfully wrote company data for customer {customer_id} to {self.stocks_file_path}")
             return True
@@ -137,12 +138,8 @@ class CustomerController:
                 metric="market_cap"
             )
             
-            # Ensure the directory exists
-            os.makedirs(os.path.dirname(self.stocks_file_path), exist_ok=True)
-            
-            # Write the comparison result to JSON file
-            with open(self.stocks_file_path, 'w') as file:
-                json.dump(comparison_result, file, indent=2)
+            # Write the comparison result to JSON file off the event loop
+            await json_persister.save(self.stocks_file_path, comparison_result)
                 
             logging.info(f"Successfully saved comparison data for customer {customer_id} to {self.stocks_file_path}")
             return True
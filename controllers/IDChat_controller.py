@@ -2,37 +2,49 @@ import sys
 import os
 import asyncio
 import json
+import logging
+import sqlite3
 from datetime import datetime, timedelta
-import pandas as pd
 from typing import Dict, List, Any, Optional, Union
+import numpy as np
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from clients.IDChat_client import IDChatClient
+from clients.IDChat_parser import RecordCache
+from shared.bar_cache import bar_cache
+from shared.ohlcv_store import ohlcv_store, format_date
+from shared.instrument_index import InstrumentIndex, get_instrument_index
 
 class IDChatController:
     """Controller for handling IDChat client operations and processing the results."""
     
-    def __init__(self):
-        self.client = None
+    def __init__(self, client: Optional[IDChatClient] = None, instrument_index: Optional[InstrumentIndex] = None):
+        self.client = client
+        self.instrument_index = instrument_index or get_instrument_index()
+        self.records = RecordCache()
     
     async def initialize(self):
-        """Initialize the client if it doesn't exist."""
+        """Initialize the client if it doesn't exist, sharing the process-wide connection pool."""
         if self.client is None:
-            self.client = IDChatClient()
-            await self.client.ensure_session()
+            self.client = IDChatClient.shared()
+        await self.client.ensure_session()
         return self
     
     async def close(self):
-        """Close the client session if it exists."""
-        if hasattr(self, 'client') and self.client and self.client.session:
-            await self.client.session.close()
+        """Close the client session if it is not the process-wide one."""
+        if self.client and self.client is not IDChatClient._shared:
+            await self.client.close()
+    
+    def query_name(self, company_name: str) -> str:
+        """Resolve aliases and tickers such as "AAPL" to the canonical company name used in IDChat queries."""
+        return self.instrument_index.canonical_name(company_name)
     
     async def get_company_summary(self, company_name: str) -> Dict[str, Any]:
         """Get a summary of company information."""
         await self.initialize()
         
         try:
-            result = await self.client.summary(company_name)
+            result = await self.client.summary(self.query_name(company_name))
             # Process the result as needed
             return {
                 "company": company_name,
@@ -49,7 +61,12 @@ class IDChatController:
             }
     
     async def get_stock_data(self, company_name: str, start_date: str = None, end_date: str = None) -> Dict[str, Any]:
-        """Get historical stock data for a company."""
+        """
+        Get historical stock data for a company.
+        
+        Bars already in the store are reused, only the missing part of the
+        date range is fetched from the API and merged in.
+        """
         await self.initialize()
         
         if not start_date:
@@ -60,16 +77,24 @@ class IDChatController:
             end_date = datetime.now().strftime("%d.%m.%Y")
         
         try:
-            result = await self.client.ohlcv(company_name, first=start_date, last=end_date)
+            result = None
+            for first, last in ohlcv_store.missing_ranges(company_name, start_date, end_date):
+                result = await self.client.ohlcv(
+                    self.query_name(company_name),
+                    first=format_date(first),
+                    last=format_date(last)
+                )
+                # Decode the nested price series once and merge them into the columnar store
+                decoded = ohlcv_store.ingest(company_name, result, first, last)
+                await self._persist_bars(company_name, decoded)
             
-            # Try to parse table data if available
-            table_data = self.client.parse_table_data(result)
+            bars = ohlcv_store.get(company_name, start_date, end_date)
             
             return {
                 "company": company_name,
                 "period": f"{start_date} to {end_date}",
-                "data": result,
-                "parsed_data": table_data.to_dict() if isinstance(table_data, pd.DataFrame) else None,
+                "data": {"message": self._bars_message(bars)} if bars else result,
+                "parsed_data": {instrument: series.to_dict() for instrument, series in bars.items()} if bars else None,
                 "timestamp": datetime.now().isoformat(),
                 "status": "success"
             }
@@ -82,37 +107,98 @@ class IDChatController:
                 "status": "error"
             }
     
+    async def _persist_bars(self, company_name: str, bars: Dict[str, Any]):
+        """Write fetched bars through to the on-disk bar cache, so they survive restarts."""
+        coverage = ohlcv_store.coverage(company_name)
+        if not bars and coverage is None:
+            return
+        try:
+            await asyncio.to_thread(bar_cache.save_bars, company_name, bars, *(coverage or (None, None)))
+        except sqlite3.Error as e:
+            logging.warning(f"Could not persist bars of {company_name}: {e}")
+    
+    async def get_stock_data_batch(
+        self,
+        company_names: List[str],
+        start_date: str = None,
+        end_date: str = None,
+        concurrency: int = 4,
+        timeout: float = 30.0
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get historical stock data for several companies concurrently.
+        
+        Args:
+            company_names: Companies to fetch
+            start_date: First date (DD.MM.YYYY), defaults to one year ago
+            end_date: Last date (DD.MM.YYYY), defaults to today
+            concurrency: Maximum number of requests in flight
+            timeout: Seconds after which a single company's request is abandoned
+            
+        Returns:
+            dict: get_stock_data results keyed by company, failed companies have status "error"
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch(company_name: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(
+                        self.get_stock_data(company_name, start_date, end_date),
+                        timeout
+                    )
+                except asyncio.TimeoutError:
+                    error = f"Timed out after {timeout} seconds"
+                except Exception as e:
+                    error = str(e)
+                return {
+                    "company": company_name,
+                    "error": error,
+                    "timestamp": datetime.now().isoformat(),
+                    "status": "error"
+                }
+        
+        results = await asyncio.gather(*(fetch(company_name) for company_name in company_names))
+        return dict(zip(company_names, results))
+    
+    async def get_company_data(self, company_name: str) -> Dict[str, Any]:
+        """Get the raw company data search and summary results of a single company."""
+        await self.initialize()
+        query_name = self.query_name(company_name)
+        company_data, summary = await asyncio.gather(
+            self.client.company_data_search(query_name),
+            self.client.summary(query_name)
+        )
+        return {"company_data": company_data, "summary": summary}
+    
+    def build_comparison(self, companies: List[str], company_data: Dict[str, Any], metric: str = None) -> Dict[str, Any]:
+        """Build the comparison result of companies from their already fetched company data."""
+        # Responses are parsed into typed records once, metrics are then looked up
+        records = {company: self.records.get(company_data[company]) for company in companies}
+        
+        # If a specific metric was requested, extract and compare it
+        compared_data = {}
+        if metric:
+            for company in companies:
+                compared_data[company] = records[company].metric(metric)
+        
+        return {
+            "companies": companies,
+            "metric": metric,
+            "data": {company: company_data[company] for company in companies},
+            "metrics": {company: records[company].metrics for company in companies},
+            "comparison": compared_data if metric else None,
+            "timestamp": datetime.now().isoformat(),
+            "status": "success"
+        }
+    
     async def compare_companies(self, companies: List[str], metric: str = None) -> Dict[str, Any]:
         """Compare multiple companies based on optional metrics."""
         await self.initialize()
         
-        tasks = []
-        for company in companies:
-            # Get company data
-            tasks.append(self.client.company_data_search(company))
-        
         try:
-            results = await asyncio.gather(*tasks)
-            
-            processed_results = {}
-            for i, company in enumerate(companies):
-                processed_results[company] = results[i]
-            
-            # If a specific metric was requested, extract and compare it
-            compared_data = {}
-            if metric:
-                for company, data in processed_results.items():
-                    # Extract the metric from data (this would need customization based on response structure)
-                    compared_data[company] = self._extract_metric(data, metric)
-            
-            return {
-                "companies": companies,
-                "metric": metric,
-                "data": processed_results,
-                "comparison": compared_data if metric else None,
-                "timestamp": datetime.now().isoformat(),
-                "status": "success"
-            }
+            results = await asyncio.gather(*(self.get_company_data(company) for company in companies))
+            return self.build_comparison(companies, dict(zip(companies, results)), metric)
         except Exception as e:
             return {
                 "companies": companies,
@@ -169,9 +255,9 @@ class IDChatController:
         await self.initialize()
         
         # Create tasks for different data sources
-        summary_task = self.client.summary(company_name)
-        stock_task = self.client.ohlcv(company_name)
-        details_task = self.client.company_data_search(company_name)
+        summary_task = self.client.summary(self.query_name(company_name))
+        stock_task = self.client.ohlcv(self.query_name(company_name))
+        details_task = self.client.company_data_search(self.query_name(company_name))
         
         try:
             # Execute all tasks concurrently
@@ -180,13 +266,14 @@ class IDChatController:
             )
             
             # Process the stock data if available
-            stock_data = self.client.parse_table_data(stock_result)
+            bars = ohlcv_store.ingest(company_name, stock_result)
+            await self._persist_bars(company_name, bars)
             
             return {
                 "company": company_name,
                 "summary": summary_result,
-                "stock_data": stock_result,
-                "stock_table": stock_data.to_dict() if isinstance(stock_data, pd.DataFrame) else None,
+                "stock_data": self._strip_series(stock_result) if bars else stock_result,
+                "stock_table": {instrument: series.to_dict() for instrument, series in bars.items()} if bars else None,
                 "details": details_result,
                 "timestamp": datetime.now().isoformat(),
                 "status": "success"
@@ -199,18 +286,30 @@ class IDChatController:
                 "status": "error"
             }
     
+    def _bars_message(self, bars: Dict[str, Any]) -> str:
+        """Summarize bars in the markdown table format of the ohlcv endpoint."""
+        lines = [
+            "| | First | Last | Min | Max | Return |",
+            "|:--|--:|--:|--:|--:|:--|",
+        ]
+        for instrument, series in bars.items():
+            if not len(series):
+                continue
+            close = series["close"]
+            lines.append(
+                f"| {instrument} | {close[0]:g} | {close[-1]:g} | {np.nanmin(series['low']):g} "
+                f"| {np.nanmax(series['high']):g} | {series['total_return'][-1]:.2%} |"
+            )
+        return "\n".join(lines)
+    
+    def _strip_series(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop the escaped price series of an ohlcv response once it is decoded."""
+        return {key: value for key, value in result.items() if key != "object"}
+    
     def _extract_metric(self, data: Dict[str, Any], metric: str) -> Any:
         """Helper method to extract a specific metric from company data."""
-        # This would need to be customized based on the structure of the data
-        # Simple example implementation:
         try:
-            # Assuming data has a structure like {messages: [{item: "..."}]}
-            for message in data.get('messages', []):
-                if 'item' in message:
-                    item_data = json.loads(message['item'])
-                    if metric in item_data:
-                        return item_data[metric]
-            return None
+            return self.records.get(data).metric(metric)
         except Exception:
             return None
 
@@ -230,6 +329,7 @@ async def example_usage():
         
     finally:
         await controller.close()
+        await IDChatClient.close_shared()
 
 if __name__ == "__main__":
     asyncio.run(example_usage())
\ No newline at end of file
@@ -0,0 +1,149 @@
+import asyncio
+import gzip
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from clients.s3_client import S3FileStore
+from shared.bar_cache import BarCache, bar_cache
+from shared.constants import S3_BUCKET_NAME
+
+
+SNAPSHOT_SUFFIX = ".sqlite3.gz"
+
+
+class CacheSnapshotter:
+    """
+    Exports the on-disk bar cache to S3 and restores it on startup.
+
+    Snapshots are gzip compressed SQLite files named by their UTC creation time,
+    so the latest snapshot sorts last. They are streamed through temporary files
+    and never held in memory as a whole.
+    """
+
+    def __init__(
+        self,
+        filestore: S3FileStore,
+        prefix: str,
+        cache: Optional[BarCache] = None,
+        bucket_name: str = S3_BUCKET_NAME,
+        interval: float = 900.0,
+        keep: int = 5
+    ):
+        """
+        Args:
+            filestore: Store to upload the snapshots to
+            prefix: Folder of the snapshots in the bucket, e.g. "test/bar_cache"
+            cache: Cache to export and restore into
+            bucket_name: Bucket of the snapshots
+            interval: Seconds between two exports
+            keep: Number of snapshots kept in the bucket
+        """
+        self.filestore = filestore
+        self.prefix = prefix.rstrip('/')
+        self.cache = cache or bar_cache
+        self.bucket_name = bucket_name
+        self.interval = interval
+        self.keep = keep
+        self._task: Optional[asyncio.Task] = None
+        self._exported = None
+        # Outcome of the last restore, reported by the readiness route
+        self.restored: Optional[Dict[str, Any]] = None
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Return the listing of the latest snapshot, None if there is none."""
+        snapshots = [
+            remote for remote in self.filestore.list_objects(self.bucket_name, f"{self.prefix}/")
+            if remote['Key'].endswith(SNAPSHOT_SUFFIX)
+        ]
+        return max(snapshots, key=lambda remote: remote['Key'], default=None)
+
+    def export(self) -> Optional[str]:
+        """
+        Upload a snapshot of the cache if it changed since the last export.
+
+        Returns:
+            str: Key of the uploaded snapshot, None if nothing changed
+        """
+        fingerprint = self.cache.fingerprint()
+        if fingerprint == self._exported:
+            return None
+        key = f"{self.prefix}/{datetime.now(timezone.utc):%Y%m%dT%H%M%S%fZ}{SNAPSHOT_SUFFIX}"
+        with tempfile.TemporaryDirectory() as directory:
+            database_path = os.path.join(directory, 'cache.sqlite3')
+            snapshot_path = database_path + '.gz'
+            self.cache.backup(database_path)
+            with open(database_path, 'rb') as source, gzip.open(snapshot_path, 'wb', compresslevel=6) as target:
+                shutil.copyfileobj(source, target)
+            self.filestore.save(snapshot_path, self.bucket_name, key)
+        self._exported = fingerprint
+        logging.info(f"Exported bar cache snapshot to s3://{self.bucket_name}/{key}")
+        self.prune()
+        return key
+
+    def prune(self) -> None:
+        """Delete all but the latest snapshots."""
+        keys = sorted(
+            remote['Key'] for remote in self.filestore.list_objects(self.bucket_name, f"{self.prefix}/")
+            if remote['Key'].endswith(SNAPSHOT_SUFFIX)
+        )
+        for key in keys[:-self.keep]:
+            self.filestore.delete(self.bucket_name, key)
+
+    def restore(self) -> Dict[str, Any]:
+        """
+        Download the latest snapshot and merge it into the cache.
+
+        Returns:
+            dict: The restored snapshot key and the number of merged rows per table
+        """
+        latest = self.latest()
+        if latest is None:
+            logging.info(f"No bar cache snapshot found in s3://{self.bucket_name}/{self.prefix}")
+            return {"snapshot": None}
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot_path = os.path.join(directory, 'cache.sqlite3.gz')
+            database_path = os.path.join(directory, 'cache.sqlite3')
+            self.filestore.load(snapshot_path, self.bucket_name, latest['Key'])
+            with gzip.open(snapshot_path, 'rb') as source, open(database_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            stats = self.cache.merge_from(database_path)
+        self._exported = self.cache.fingerprint()
+        logging.info(f"Restored bar cache snapshot {latest['Key']} ({latest['Size']} bytes): {stats}")
+        return {"snapshot": latest['Key'], **stats}
+
+    async def restore_async(self) -> Dict[str, Any]:
+        """Restore the latest snapshot off the event loop, recording and logging rather than raising errors."""
+        try:
+            result = await asyncio.to_thread(self.restore)
+        except Exception as e:
+            logging.warning(f"Could not restore bar cache snapshot: {e}")
+            result = {"snapshot": None, "error": str(e)}
+        self.restored = {**result, "timestamp": datetime.now(timezone.utc).isoformat()}
+        return result
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.export)
+            except Exception as e:
+                logging.warning(f"Could not export bar cache snapshot: {e}")
+
+    async def start(self):
+        """Start exporting snapshots periodically."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic export and export the final state of the cache."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            await asyncio.to_thread(self.export)
+        except Exception as e:
+            logging.warning(f"Could not export bar cache snapshot: {e}")
@@ -0,0 +1,118 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class FetchStats:
+    """Counts of a planned fetch."""
+
+    __slots__ = ("requested", "unique", "failed")
+
+    def __init__(self, requested: int = 0, unique: int = 0, failed: int = 0):
+        self.requested = requested
+        self.unique = unique
+        self.failed = failed
+
+    @property
+    def saved(self) -> int:
+        """Upstream calls saved by fetching each company once."""
+        return self.requested - self.unique
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "requested": self.requested,
+            "unique": self.unique,
+            "saved": self.saved,
+            "failed": self.failed,
+        }
+
+
+class FetchError:
+    """Failure of fetching one company, kept so the other companies still succeed."""
+
+    __slots__ = ("company", "error")
+
+    def __init__(self, company: str, error: Exception):
+        self.company = company
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"company": self.company, "error": str(self.error), "status": "error"}
+
+
+class CompanyFetchPlanner:
+    """
+    Fetches the union of companies of many portfolios, each company only once.
+
+    Companies are deduplicated by their canonical key, fetched with bounded
+    concurrency and the results are fanned out to every portfolio holding them.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[Any]],
+        key: Optional[Callable[[str], str]] = None,
+        concurrency: int = 4
+    ):
+        """
+        Args:
+            fetch: Coroutine function fetching the data of one company
+            key: Maps a company name to the key it is deduplicated on (default: the name itself)
+            concurrency: Maximum number of fetches in flight
+        """
+        self.fetch = fetch
+        self.key = key or (lambda company: company)
+        self.concurrency = concurrency
+
+    def plan(self, portfolios: Dict[str, List[str]]) -> Dict[str, str]:
+        """
+        Collect the unique companies of all portfolios.
+
+        Args:
+            portfolios: Company names keyed by portfolio ID
+
+        Returns:
+            dict: The name to fetch each unique company with, keyed by its canonical key
+        """
+        unique = {}
+        for companies in portfolios.values():
+            for company in companies:
+                unique.setdefault(self.key(company), company)
+        return unique
+
+    async def execute(self, portfolios: Dict[str, List[str]]):
+        """
+        Fetch every unique company once and fan the results out to the portfolios.
+
+        Args:
+            portfolios: Company names keyed by portfolio ID
+
+        Returns:
+            tuple: Company data keyed by portfolio ID and company name, and the FetchStats.
+                Failed companies get an error entry instead of data.
+        """
+        unique = self.plan(portfolios)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(company: str) -> Any:
+            async with semaphore:
+                try:
+                    return await self.fetch(company)
+                except Exception as e:
+                    return FetchError(company, e)
+
+        keys = list(unique)
+        fetched = dict(zip(keys, await asyncio.gather(*(fetch(unique[key]) for key in keys))))
+
+        stats = FetchStats(
+            requested=sum(len(companies) for companies in portfolios.values()),
+            unique=len(unique),
+            failed=sum(isinstance(result, FetchError) for result in fetched.values())
+        )
+        results = {}
+        for portfolio_id, companies in portfolios.items():
+            results[portfolio_id] = {}
+            for company in companies:
+                result = fetched[self.key(company)]
+                results[portfolio_id][company] = result.to_dict() if isinstance(result, FetchError) else result
+        return results, stats
+
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import math
+from datetime import datetime, timedelta
+from functools import reduce
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from clients.response_cache import ResponseCache
+from controllers.portfolio_service import PortfolioService
+from shared.ohlcv_store import Bars, ohlcv_store
+
+
+TRADING_DAYS = 252
+
+
+def _finite(value: float) -> Optional[float]:
+    """Return value as a float, None if it is NaN or infinite."""
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def _to_list(values: np.ndarray) -> List[Optional[float]]:
+    """Convert an array to a JSON serializable list, with NaN and infinite values as None."""
+    return [value if math.isfinite(value) else None for value in values.tolist()]
+
+
+def daily_returns(prices: np.ndarray) -> np.ndarray:
+    """Simple daily returns of a (days x instruments) price matrix."""
+    return prices[1:] / prices[:-1] - 1.0
+
+
+def rolling_volatility(returns: np.ndarray, window: int) -> np.ndarray:
+    """
+    Annualized rolling standard deviation of returns along the first axis.
+
+    The first window - 1 rows are NaN.
+    """
+    result = np.full(returns.shape, np.nan)
+    if window < 2 or len(returns) < window:
+        return result
+    windows = sliding_window_view(returns, window, axis=0)
+    result[window - 1:] = windows.std(axis=-1, ddof=1) * np.sqrt(TRADING_DAYS)
+    return result
+
+
+def drawdown(values: np.ndarray) -> np.ndarray:
+    """Relative distance of a value series from its running maximum."""
+    return values / np.maximum.accumulate(values, axis=0) - 1.0
+
+
+def align_closes(bars: Dict[str, Bars]):
+    """
+    Align the close prices of several instruments on their common dates.
+
+    Args:
+        bars: Bars keyed by company
+
+    Returns:
+        tuple: The common timestamps and a (days x companies) close price matrix
+    """
+    series = {}
+    for company, company_bars in bars.items():
+        valid = ~np.isnan(company_bars["close"])
+        series[company] = (company_bars.timestamp[valid], company_bars["close"][valid])
+    timestamps = reduce(np.intersect1d, (timestamp for timestamp, _ in series.values()))
+    prices = np.empty((len(timestamps), len(series)))
+    for column, (timestamp, close) in enumerate(series.values()):
+        prices[:, column] = close[np.searchsorted(timestamp, timestamps)]
+    return timestamps, prices
+
+
+class PortfolioAnalytics:
+    """
+    Computes return, risk and correlation analytics of customer portfolios.
+
+    All instruments of a portfolio are processed as one NumPy matrix, results
+    are cached per customer and window.
+    """
+
+    def __init__(self, portfolio_service: PortfolioService, ttl: float = 300.0, lookback_days: int = 365):
+        """
+        Args:
+            portfolio_service: Service providing customers, their holdings and the IDChat controller
+            ttl: Seconds the analytics of a customer are cached
+            lookback_days: Number of days of price history to analyze
+        """
+        self.portfolio_service = portfolio_service
+        self.lookback_days = lookback_days
+        self.cache = ResponseCache(default_ttl=ttl, max_entries=256)
+
+    async def get_analytics(self, customer_id: str, window: int = 20) -> Dict[str, Any]:
+        """
+        Return the analytics of a customer's portfolio, weighted by the shares held.
+
+        Args:
+            customer_id (str): The ID of the customer
+            window (int): Number of trading days of the rolling volatility
+
+        Returns:
+            dict: Per instrument and portfolio series and the correlation matrix
+        """
+        await self.portfolio_service.initialize()
+        if not self.portfolio_service.get_customer(customer_id):
+            return {"error": f"Customer with ID {customer_id} not found", "status": "error"}
+        try:
+            return await self.cache.get_or_fetch(
+                ("analytics", customer_id, window),
+                lambda: self._compute(customer_id, window)
+            )
+        except LookupError as e:
+            return {"customer_id": customer_id, "error": str(e), "status": "error"}
+
+    async def _load_bars(self, companies: List[str]) -> Tuple[Dict[str, Bars], Dict[str, List[str]]]:
+        """
+        Fetch the bars of the primary listing of each company.
+
+        Returns:
+            tuple: Bars keyed by company, and the listings of companies without a primary listing
+        """
+        end = datetime.now()
+        start = end - timedelta(days=self.lookback_days)
+        start_date, end_date = start.strftime("%d.%m.%Y"), end.strftime("%d.%m.%Y")
+        controller = self.portfolio_service.id_chat_controller
+        await controller.get_stock_data_batch(companies, start_date, end_date)
+
+        bars, unmatched = {}, {}
+        instrument_index = self.portfolio_service.instrument_index
+        for company in companies:
+            company_bars = ohlcv_store.get(company, start_date, end_date)
+            if not company_bars:
+                logging.warning(f"No stock data available for {company}")
+                continue
+            # Other listings, e.g. depositary receipts, trade in other currencies and
+            # can not be added to the value of the portfolio
+            listing = instrument_index.primary_listing(company, company_bars)
+            if listing is None:
+                logging.warning(f"No primary listing of {company} among {list(company_bars)}")
+                unmatched[company] = list(company_bars)
+                continue
+            bars[company] = company_bars[listing]
+        return bars, unmatched
+
+    async def _compute(self, customer_id: str, window: int) -> Dict[str, Any]:
+        customer = self.portfolio_service.get_customer(customer_id)
+        shares = {
+            investment.get("company"): float(investment.get("shares", 0))
+            for investment in customer.get("investments", [])
+        }
+        bars, unmatched = await self._load_bars(list(shares))
+        if not bars:
+            # Raised rather than returned so that the failure is not cached
+            raise LookupError("No stock data available")
+
+        result = await asyncio.to_thread(self.compute, bars, shares, window)
+        return {
+            "customer_id": customer_id,
+            "customer_name": customer.get("name"),
+            "missing": [company for company in shares if company not in bars],
+            "unmatched": unmatched,
+            **result,
+            "timestamp": datetime.now().isoformat(),
+            "status": "success"
+        }
+
+    @staticmethod
+    def compute(bars: Dict[str, Bars], shares: Dict[str, float], window: int) -> Dict[str, Any]:
+        """
+        Compute the analytics of instruments weighted by shares.
+
+        Args:
+            bars: Bars keyed by company
+            shares: Number of shares held keyed by company
+            window: Number of trading days of the rolling volatility
+
+        Returns:
+            dict: JSON serializable analytics, return and volatility series start at the second date
+        """
+        companies = list(bars)
+        timestamps, prices = align_closes(bars)
+        weights = np.array([shares.get(company, 0.0) for company in companies])
+
+        returns = daily_returns(prices)
+        volatility = rolling_volatility(returns, window)
+        values = prices @ weights
+        portfolio_returns = daily_returns(values)
+        portfolio_volatility = rolling_volatility(portfolio_returns[:, None], window)[:, 0]
+        portfolio_drawdown = drawdown(values) if len(values) else values
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = np.corrcoef(returns, rowvar=False) if len(returns) > 1 else np.full((len(companies),) * 2, np.nan)
+        correlation = np.atleast_2d(correlation)
+
+        dates = np.datetime_as_string(timestamps, unit="D").tolist()
+        instruments = {}
+        for column, company in enumerate(companies):
+            instrument_drawdown = drawdown(prices[:, column]) if len(prices) else prices[:, column]
+            instruments[company] = {
+                "instrument": bars[company].instrument,
+                "shares": shares.get(company, 0.0),
+                "close": _to_list(prices[:, column]),
+                "returns": _to_list(returns[:, column]),
+                "volatility": _to_list(volatility[:, column]),
+                "drawdown": _to_list(instrument_drawdown),
+                "max_drawdown": _finite(instrument_drawdown.min()) if len(instrument_drawdown) else None,
+                "total_return": _finite(prices[-1, column] / prices[0, column] - 1.0) if len(prices) else None,
+            }
+
+        return {
+            "window": window,
+            "dates": dates,
+            "instruments": instruments,
+            "portfolio": {
+                "value": _to_list(values),
+                "returns": _to_list(portfolio_returns),
+                "volatility": _to_list(portfolio_volatility),
+                "drawdown": _to_list(portfolio_drawdown),
+                "max_drawdown": _finite(portfolio_drawdown.min()) if len(values) else None,
+                "total_return": _finite(values[-1] / values[0] - 1.0) if len(values) else None,
+            },
+            "correlation": {
+                "companies": companies,
+                "matrix": [_to_list(row) for row in correlation],
+            },
+        }
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from clients.response_cache import ResponseCache
+from controllers.IDChat_controller import IDChatController
+from controllers.fetch_planner import CompanyFetchPlanner
+from shared.bar_cache import BarCache, bar_cache
+from shared.constants import CUSTOMERS_FILE
+from shared.instrument_index import InstrumentIndex, get_instrument_index
+
+
+class PortfolioService:
+    """
+    Serves the portfolios of all customers from one process.
+
+    Customers are indexed by ID and holdings by company when the customer file
+    is loaded. Company data is fetched on demand and shared by every portfolio
+    holding the company.
+    """
+
+    def __init__(
+        self,
+        id_chat_controller: Optional[IDChatController] = None,
+        file_path: str = CUSTOMERS_FILE,
+        instrument_index: Optional[InstrumentIndex] = None,
+        company_data_ttl: float = 600.0,
+        fetch_concurrency: int = 4,
+        cache: Optional[BarCache] = None
+    ):
+        """
+        Args:
+            id_chat_controller: Controller for getting company data
+            file_path: JSON file with the customers and their investments
+            instrument_index: Known companies, used to merge aliases of the same company
+            company_data_ttl: Seconds company data is shared before it is fetched again
+            fetch_concurrency: Maximum number of company fetches in flight
+            cache: On-disk store keeping company data across restarts
+        """
+        self.id_chat_controller = id_chat_controller
+        self.file_path = file_path
+        self.instrument_index = instrument_index or get_instrument_index()
+        self.customers_by_id: Dict[str, Dict[str, Any]] = {}
+        self.holdings_by_company: Dict[str, Dict[str, float]] = {}
+        self.company_cache = ResponseCache(default_ttl=company_data_ttl, max_entries=1024)
+        self.fetch_concurrency = fetch_concurrency
+        self.cache = cache or bar_cache
+        self._loaded = False
+
+    async def initialize(self):
+        """Load and index the customers if they are not loaded yet."""
+        if not self._loaded:
+            await self.load_customers()
+        if self.id_chat_controller is None:
+            self.id_chat_controller = IDChatController()
+        await self.id_chat_controller.initialize()
+        return self
+
+    async def load_customers(self):
+        """Load the customer file off the event loop and rebuild the indexes."""
+        customers_data = await asyncio.to_thread(self._read_customers)
+        self.index_customers(customers_data.get("customers", []))
+        self._loaded = True
+        logging.info(f"Indexed {len(self.customers_by_id)} customers holding {len(self.holdings_by_company)} companies")
+
+    def _read_customers(self) -> Dict[str, Any]:
+        with open(self.file_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def index_customers(self, customers: List[Dict[str, Any]]):
+        """Index customers by ID and their holdings by canonical company name."""
+        customers_by_id = {}
+        holdings_by_company: Dict[str, Dict[str, float]] = {}
+        for customer in customers:
+            customers_by_id[customer.get("id")] = customer
+            for investment in customer.get("investments", []):
+                company = self.instrument_index.canonical_name(investment.get("company"))
+                holdings_by_company.setdefault(company, {})[customer.get("id")] = investment.get("shares", 0)
+        self.customers_by_id = customers_by_id
+        self.holdings_by_company = holdings_by_company
+
+    def get_customer(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieve customer information by ID"""
+        return self.customers_by_id.get(customer_id)
+
+    def get_customer_companies(self, customer_id: str) -> List[str]:
+        """Retrieve the companies a customer has invested in"""
+        customer = self.get_customer(customer_id)
+        if not customer:
+            return []
+        return [investment.get("company") for investment in customer.get("investments", [])]
+
+    def get_company_holders(self, company: str) -> Dict[str, float]:
+        """Retrieve the shares held in a company, keyed by customer ID"""
+        return self.holdings_by_company.get(self.instrument_index.canonical_name(company), {})
+
+    async def get_company_data(self, company: str) -> Dict[str, Any]:
+        """Get the data of a company, shared between all portfolios holding it."""
+        canonical = self.instrument_index.canonical_name(company)
+        return await self.company_cache.get_or_fetch(
+            ("company_data", canonical),
+            lambda: self._fetch_company_data(company, canonical)
+        )
+
+    async def _fetch_company_data(self, company: str, canonical: str) -> Dict[str, Any]:
+        """Read company data persisted by this or another pod, fetching it only if it is too old."""
+        try:
+            data = await asyncio.to_thread(self.cache.load_company, canonical, self.company_cache.default_ttl)
+        except sqlite3.Error as e:
+            logging.warning(f"Could not read cached company data of {canonical}: {e}")
+            data = None
+        if data is not None:
+            return data
+        data = await self.id_chat_controller.get_company_data(company)
+        try:
+            await asyncio.to_thread(self.cache.save_company, canonical, data)
+        except sqlite3.Error as e:
+            logging.warning(f"Could not persist company data of {canonical}: {e}")
+        return data
+
+    async def get_customer_stocks(self, customer_id: str, metric: str = "market_cap") -> Dict[str, Any]:
+        """
+        Compute the comparison of a customer's companies on demand.
+
+        Args:
+            customer_id (str): The ID of the customer
+            metric (str): Metric to compare the companies on
+
+        Returns:
+            dict: The comparison in the format of IDChatController.compare_companies
+        """
+        await self.initialize()
+        customer = self.get_customer(customer_id)
+        if not customer:
+            return {"error": f"Customer with ID {customer_id} not found", "status": "error"}
+
+        companies = self.get_customer_companies(customer_id)
+        # Fetched like the companies of several customers, so a failing company gets an error entry
+        planner = CompanyFetchPlanner(
+            self.get_company_data,
+            key=self.instrument_index.canonical_name,
+            concurrency=self.fetch_concurrency
+        )
+        company_data, _ = await planner.execute({customer_id: companies})
+        comparison = self.id_chat_controller.build_comparison(companies, company_data[customer_id], metric)
+        return {"customer_id": customer_id, "customer_name": customer.get("name"), **comparison}
+
+    async def get_customers_stocks(self, customer_ids: List[str], metric: str = "market_cap") -> Dict[str, Any]:
+        """
+        Compute the comparisons of several customers, fetching each company only once.
+
+        Args:
+            customer_ids (list): The IDs of the customers
+            metric (str): Metric to compare the companies on
+
+        Returns:
+            dict: Comparisons keyed by customer ID and stats of the saved upstream calls
+        """
+        await self.initialize()
+        portfolios = {
+            customer_id: self.get_customer_companies(customer_id)
+            for customer_id in customer_ids
+            if self.get_customer(customer_id)
+        }
+        planner = CompanyFetchPlanner(
+            self.get_company_data,
+            key=self.instrument_index.canonical_name,
+            concurrency=self.fetch_concurrency
+        )
+        company_data, stats = await planner.execute(portfolios)
+        logging.info(f"Fetched companies of {len(portfolios)} customers: {stats.to_dict()}")
+
+        customers = {}
+        for customer_id in customer_ids:
+            if customer_id not in portfolios:
+                customers[customer_id] = {"error": f"Customer with ID {customer_id} not found", "status": "error"}
+                continue
+            comparison = self.id_chat_controller.build_comparison(
+                portfolios[customer_id], company_data[customer_id], metric
+            )
+            customers[customer_id] = {
+                "customer_id": customer_id,
+                "customer_name": self.get_customer(customer_id).get("name"),
+                **comparison
+            }
+        return {
+            "customers": customers,
+            "stats": stats.to_dict(),
+            "timestamp": datetime.now().isoformat(),
+            "status": "success"
+        }
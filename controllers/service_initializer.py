@@ -1,54 +1,210 @@
+import asyncio
 import logging
 import os
+import time
 import traceback
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
 from controllers.IDChat_controller import IDChatController
 from controllers.text_interpreter_controller import TextInterpreterController
+from controllers.Customer_controller import CustomerController
+from shared.bar_cache import bar_cache
+from shared.constants import MENTIONED_STOCK_FILE, CUSTOMER_STOCKS_FILE
+from shared.ohlcv_store import ohlcv_store
+from shared.snapshot_cache import snapshot_cache
 
 class ServiceInitializer:
-    def __init__(self):
-        self.customer_id = None
+    """
+    Warms up the services in the background, so the API serves requests right away.
+
+    Warm-up runs in two phases of concurrent steps, each with a timeout:
+    1. restore the bar cache, initialize the IDChat controller and load the customers
+    2. start the text interpreter and save the stocks of the customer
+    The service is ready once every first phase step succeeded, the second phase
+    only refreshes data from the IDChat API. If a first phase step failed or timed
+    out the service is degraded until a timed out step still succeeds.
+    """
+
+    def __init__(
+        self,
+        customer_id: Optional[str] = None,
+        portfolio_service=None,
+        snapshotter=None,
+        step_timeout: float = 30.0,
+        fetch_timeout: float = 120.0
+    ):
+        """
+        Args:
+            customer_id: Customer whose stocks are saved to customer_stocks.json
+            portfolio_service: Service whose customers are loaded during warm-up
+            snapshotter: Restores the bar cache snapshot from S3 before the cache is warmed
+            step_timeout: Seconds a first phase step may take
+            fetch_timeout: Seconds a second phase step, which fetches from the IDChat API, may take
+        """
+        self.customer_id = customer_id
+        self.portfolio_service = portfolio_service
+        self.snapshotter = snapshotter
+        self.step_timeout = step_timeout
+        self.fetch_timeout = fetch_timeout
         self.id_chat_controller = None
         self.text_interpreter = None
-        
+        self.customer_controller = None
+        self.logger = logging.getLogger(__name__)
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.required_steps: List[str] = []
+        self._first_phase_done = False
+        self._task: Optional[asyncio.Task] = None
+        self._step_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the first phase finished and all of its steps succeeded."""
+        return self._first_phase_done and all(
+            self.steps.get(name, {}).get("status") == "ready" for name in self.required_steps
+        )
+
+    @property
+    def status(self) -> str:
+        if not self._first_phase_done:
+            return "warming"
+        return "ready" if self.ready else "degraded"
+
     def set_customer_id(self, customer_id):
         self.customer_id = customer_id
-        
+
+    async def start(self, logger: Optional[logging.Logger] = None):
+        """Start the warm-up in the background and return immediately."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.initialize(logger or self.logger))
+
+    async def stop(self):
+        """Cancel an unfinished warm-up, including steps that continue after a timeout, and stop the started services."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        for task in list(self._step_tasks):
+            task.cancel()
+        if self.text_interpreter:
+            await self.text_interpreter.stop()
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable[Any]], timeout: float) -> Any:
+        """
+        Run one warm-up step, recording its outcome instead of raising.
+
+        A step that times out is not cancelled, it keeps running in the background
+        and its outcome is recorded once it finishes.
+        """
+        self.steps[name] = {"status": "running"}
+        started = time.perf_counter()
+        task = asyncio.create_task(step())
+        self._step_tasks.add(task)
+
+        def record(task: asyncio.Task):
+            self._step_tasks.discard(task)
+            self.steps[name]["duration"] = round(time.perf_counter() - started, 3)
+            if task.cancelled():
+                self.steps[name]["status"] = "cancelled"
+            elif task.exception() is not None:
+                error = task.exception()
+                self.steps[name].update(status="failed", error=str(error))
+                self.logger.error(f"Warm-up step {name} failed: {str(error)}")
+                self.logger.error("".join(traceback.format_exception(error)))
+            else:
+                self.steps[name]["status"] = "ready"
+
+        task.add_done_callback(record)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self.steps[name]["status"] = "timeout"
+            self.logger.error(f"Warm-up step {name} timed out after {timeout}s, it continues in the background")
+        except Exception:
+            # Recorded by the done callback
+            pass
+        return None
+
+    async def _warm_bar_cache(self):
+        # Restore the snapshot of other pods first, then load the cache into memory
+        if self.snapshotter is not None:
+            await self.snapshotter.restore_async()
+        # The bars are read in a worker thread, but the store is only changed on the event loop,
+        # as request handlers and the other steps use it concurrently
+        companies = await asyncio.to_thread(bar_cache.load_all)
+        stats = bar_cache.restore(ohlcv_store, companies)
+        self.logger.info(f"===== Bar cache restored: {stats} =====")
+
+    async def _initialize_id_chat(self):
+        self.id_chat_controller = IDChatController()
+        await self.id_chat_controller.initialize()
+        self.logger.info("===== IDChat controller initialized successfully =====")
+
+    async def _load_snapshots(self):
+        for path in (MENTIONED_STOCK_FILE, CUSTOMER_STOCKS_FILE):
+            try:
+                await snapshot_cache.get(path)
+            except FileNotFoundError:
+                self.logger.info(f"No snapshot to load at {path}")
+
+    async def _start_text_interpreter(self):
+        # Create the data directory if it doesn't exist
+        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+        os.makedirs(data_dir, exist_ok=True)
+        conversation_file = os.path.join(data_dir, 'conversation.txt')
+        self.logger.info(f"Conversation file: {conversation_file} (exists: {os.path.exists(conversation_file)})")
+
+        self.text_interpreter = TextInterpreterController(
+            data_dir=data_dir,
+            id_chat_controller=self.id_chat_controller
+        )
+        await self.text_interpreter.start(self.logger)
+        self.logger.info("===== Text interpreter controller started successfully =====")
+
+    async def _save_customer_stocks(self):
+        self.customer_controller = CustomerController(self.id_chat_controller)
+        if not await self.customer_controller.initialize(self.customer_id):
+            raise RuntimeError(f"Stocks of customer {self.customer_id} could not be saved")
+        self.logger.info(f"===== Stocks of customer {self.customer_id} saved =====")
+
     async def initialize(self, logger: logging.Logger):
         """Initialize services and start background tasks"""
-        try:
-            # Initialize IDChatController first
-            logger.info("===== Initializing IDChat controller =====")
-            self.id_chat_controller = IDChatController()
-            await self.id_chat_controller.initialize()
-            logger.info("===== IDChat controller initialized successfully =====")
-            
-            # Create the data directory if it doesn't exist
-            data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
-            os.makedirs(data_dir, exist_ok=True)
-            logger.info(f"Data directory: {data_dir}")
-            
-            # Ensure conversation.txt exists (it should based on your attachment)
-            conversation_file = os.path.join(data_dir, 'conversation.txt')
-            logger.info(f"Conversation file: {conversation_file} (exists: {os.path.exists(conversation_file)})")
-            
-            # Then initialize TextInterpreterController with the IDChatController
-            logger.info("===== Initializing Text interpreter controller =====")
-            
-            # Explicitly check if id_chat_controller is properly initialized
-            if not self.id_chat_controller or not hasattr(self.id_chat_controller, 'get_stock_data'):
-                logger.error("IDChat controller is not properly initialized!")
-                # Re-initialize as a last resort
-                self.id_chat_controller = IDChatController()
-                await self.id_chat_controller.initialize()
-            
-            self.text_interpreter = TextInterpreterController(
-                data_dir=data_dir,
-                id_chat_controller=self.id_chat_controller
-            )
-            await self.text_interpreter.start(logger)
-            logger.info("===== Text interpreter controller started successfully =====")
-            
-        except Exception as e:
-            logger.error(f"Error during service initialization: {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
\ No newline at end of file
+        self.logger = logger
+        started = time.perf_counter()
+        logger.info("===== Warming up services =====")
+
+        first_phase = {
+            "bar_cache": self._warm_bar_cache,
+            "id_chat": self._initialize_id_chat,
+            "snapshots": self._load_snapshots,
+        }
+        if self.portfolio_service is not None:
+            first_phase["customers"] = self.portfolio_service.load_customers
+        self.required_steps = list(first_phase)
+        await asyncio.gather(*(self._run_step(name, step, self.step_timeout) for name, step in first_phase.items()))
+        self._first_phase_done = True
+        if self.ready:
+            logger.info(f"===== Ready after {time.perf_counter() - started:.2f}s: {self.steps} =====")
+        else:
+            logger.error(f"===== Degraded after {time.perf_counter() - started:.2f}s: {self.steps} =====")
+
+        if self.id_chat_controller is None:
+            logger.error("IDChat controller is not initialized, skipping the IDChat warm-up")
+            return
+        # Both steps fetch from the IDChat API, the bar cache is warm by now so only missing bars are requested
+        second_phase = [self._run_step("text_interpreter", self._start_text_interpreter, self.fetch_timeout)]
+        if self.customer_id:
+            second_phase.append(self._run_step("customer_stocks", self._save_customer_stocks, self.fetch_timeout))
+        await asyncio.gather(*second_phase)
+        logger.info(f"===== Warm-up completed after {time.perf_counter() - started:.2f}s =====")
+
+    def readiness(self) -> Dict[str, Any]:
+        """Report whether the service is ready, the state of each warm-up step and the cache warmth."""
+        cache = {"bars": ohlcv_store.stats()}
+        if self.snapshotter is not None:
+            cache["snapshot"] = self.snapshotter.restored
+        if self.portfolio_service is not None:
+            cache["customers"] = len(self.portfolio_service.customers_by_id)
+        for name, path in (("mentioned_stock", MENTIONED_STOCK_FILE), ("customer_stocks", CUSTOMER_STOCKS_FILE)):
+            cache[name] = snapshot_cache.snapshot(path).version
+        return {
+            "status": self.status,
+            "steps": self.steps,
+            "cache": cache
+        }
@@ -0,0 +1,189 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from clients.IDChat_parser import CompanyRecord
+from shared.instrument_index import InstrumentIndex, get_instrument_index
+from shared.ohlcv_store import Bars, DateLike, decode_ohlcv_payload, to_day
+
+
+FIELDS = ("all", "bars", "summary")
+
+
+def _bars_summary(bars: Bars) -> Dict[str, Any]:
+    """First and last date, last close and return of a series."""
+    if not len(bars):
+        return {"bars": 0}
+    close = bars["close"]
+    valid = close[~np.isnan(close)]
+    return {
+        "bars": len(bars),
+        "first": str(bars.timestamp[0].astype("datetime64[D]")),
+        "last": str(bars.timestamp[-1].astype("datetime64[D]")),
+        "close": float(valid[-1]) if len(valid) else None,
+        "low": float(valid.min()) if len(valid) else None,
+        "high": float(valid.max()) if len(valid) else None,
+        "total_return": float(valid[-1] / valid[0] - 1.0) if len(valid) else None,
+    }
+
+
+class CompanyEntry:
+    """One company of a stock document with its decoded bars and parsed record."""
+
+    __slots__ = ("name", "raw", "bars", "record", "compared")
+
+    def __init__(self, name: str, raw: Dict[str, Any], compared: Any = None):
+        self.name = name
+        self.raw = raw
+        self.compared = compared
+        self.bars = self._decode_bars(raw)
+        self.record = CompanyRecord.from_data(raw) if "company_data" in raw or "summary" in raw else None
+
+    @staticmethod
+    def _decode_bars(raw: Dict[str, Any]) -> Dict[str, Bars]:
+        # Mentioned stocks keep their bars in parsed_data and data, customer stocks in
+        # stock_table and stock_data, each either as decoded columns or as the raw payload
+        for key in ("parsed_data", "stock_table"):
+            parsed = raw.get(key)
+            if isinstance(parsed, dict):
+                return {instrument: Bars.from_dict(columns) for instrument, columns in parsed.items()}
+        for key in ("data", "stock_data"):
+            payload = raw.get(key)
+            if not isinstance(payload, dict):
+                continue
+            bars = decode_ohlcv_payload(payload)
+            if not bars and key == "stock_data":
+                bars = CompanyEntry._decode_bars(payload)
+            if bars:
+                return bars
+        return {}
+
+    def sliced_bars(self, start: DateLike, end: DateLike) -> Dict[str, Bars]:
+        if start is None and end is None:
+            return self.bars
+        return {instrument: bars.slice(start, end).with_returns() for instrument, bars in self.bars.items()}
+
+    def project(self, fields: str, start: DateLike = None, end: DateLike = None) -> Dict[str, Any]:
+        """Return the requested fields of the company, with bars restricted to [start, end]."""
+        bars = self.sliced_bars(start, end)
+        if fields == "bars":
+            return {instrument: series.to_dict() for instrument, series in bars.items()}
+        if fields == "summary":
+            summary = {"status": self.raw["status"]} if "status" in self.raw else {}
+            if self.record is not None:
+                summary.update(self.record.metrics)
+            if self.compared is not None:
+                summary["compared"] = self.compared
+            if bars:
+                summary["instruments"] = {instrument: _bars_summary(series) for instrument, series in bars.items()}
+            return summary
+        if start is None and end is None:
+            return self.raw
+        windowed = {instrument: series.to_dict() for instrument, series in bars.items()}
+        if "stock_data" in self.raw or "stock_table" in self.raw:
+            stock_data = self.raw.get("stock_data")
+            if isinstance(stock_data, dict):
+                # The raw series would hold the bars outside of the window
+                stock_data = {key: value for key, value in stock_data.items() if key not in ("object", "parsed_data")}
+            return {**self.raw, "stock_data": stock_data, "stock_table": windowed}
+        return {**self.raw, "parsed_data": windowed}
+
+
+class StockDocumentIndex:
+    """
+    Company index of a mentioned stock or customer stock document.
+
+    Built once per document version, so queries only touch the selected
+    companies and only serialize what they return.
+    """
+
+    def __init__(self, document: Dict[str, Any], instrument_index: Optional[InstrumentIndex] = None):
+        self.document = document
+        self.instrument_index = instrument_index or get_instrument_index()
+        data = document.get("data")
+        if "company" in document and "companies" not in document:
+            # Documents written before mentioned stocks were keyed by company
+            data = {document["company"]: document}
+        comparison = document.get("comparison") or {}
+        self.entries: Dict[str, CompanyEntry] = {}
+        self._by_key: Dict[str, str] = {}
+        for name, raw in (data or {}).items():
+            if not isinstance(raw, dict):
+                continue
+            self.entries[name] = CompanyEntry(name, raw, comparison.get(name))
+            self._by_key[name.casefold()] = name
+            self._by_key.setdefault(self.instrument_index.canonical_name(name).casefold(), name)
+        self.companies: List[str] = [
+            company for company in document.get("companies", list(self.entries)) if company in self.entries
+        ]
+
+    def lookup(self, company: str) -> Optional[str]:
+        """Resolve a company name, alias or ticker in any case to its key in the document."""
+        company = company.strip()
+        candidates = (
+            company,
+            self.instrument_index.canonical_name(company),
+            self.instrument_index.canonical_name(company.upper())
+        )
+        for candidate in candidates:
+            key = self._by_key.get(candidate.casefold())
+            if key is not None:
+                return key
+        return None
+
+    def query(
+        self,
+        companies: Optional[List[str]] = None,
+        fields: str = "all",
+        start: DateLike = None,
+        end: DateLike = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Select, project and window the companies of the document.
+
+        Args:
+            companies: Companies to return, all companies of the document if None
+            fields: "all" for the stored data, "bars" for the bars only, "summary" for metrics and bar summaries
+            start: First date of the returned bars
+            end: Last date of the returned bars
+            offset: Number of selected companies to skip
+            limit: Maximum number of companies to return
+
+        Returns:
+            dict: The selected companies and their projected data
+
+        Raises:
+            ValueError: If fields is unknown or a date can not be parsed
+        """
+        if fields not in FIELDS:
+            raise ValueError(f"Unknown fields {fields!r}, expected one of {', '.join(FIELDS)}")
+        start, end = to_day(start), to_day(end)
+        missing = []
+        if companies is None:
+            selected = self.companies
+        else:
+            selected = []
+            for company in companies:
+                key = self.lookup(company)
+                if key is None:
+                    missing.append(company)
+                elif key not in selected:
+                    selected.append(key)
+        page = selected[offset:None if limit is None else offset + limit]
+        return {
+            "companies": page,
+            "total": len(selected),
+            "offset": offset,
+            "limit": limit,
+            "missing": missing,
+            "fields": fields,
+            "period": self.document.get("period"),
+            "from": None if start is None else str(start),
+            "to": None if end is None else str(end),
+            "metric": self.document.get("metric"),
+            "data": {company: self.entries[company].project(fields, start, end) for company in page},
+            "timestamp": self.document.get("timestamp"),
+            "status": self.document.get("status"),
+        }
@@ -1,18 +1,23 @@
 import os
 import logging
-import json
-import re
-import asyncio
+from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
+from shared.json_store import json_persister
+from shared.broadcaster import Broadcaster, mentioned_stock_events
+from shared.file_watcher import FileWatcher
+from shared.tail_reader import TailReader
+from shared.instrument_index import get_instrument_index
 
 class TextInterpreterController:
-    def __init__(self, data_dir=None, id_chat_controller=None):
+    def __init__(self, data_dir=None, id_chat_controller=None, instrument_index=None, events=None):
         """
         Initialize the Text Interpreter Controller.
         
         Args:
             data_dir (str, optional): Directory where conversation.txt is located
             id_chat_controller: Controller for getting stock data
+            instrument_index (InstrumentIndex, optional): Known companies, loaded from data/instruments.json by default
+            events (Broadcaster, optional): Receives the changes of every saved result
         """
         # Use absolute path based on file location if data_dir not provided
         if data_dir is None:
@@ -24,21 +29,29 @@ class TextInterpreterController:
         self.stock_file = "mentioned_stock.json"
         self.logger = None
         self.is_running = False
-        self.task = None
+        self.watcher = None
         self.id_chat_controller = id_chat_controller
+        self.last_companies = None
+        # Latest stock data per mentioned company
+        self.mentioned_stocks = {}
+        self.events = events or mentioned_stock_events
+        self.published_companies = set()
         
-        # List of common company names to check against
-        self.company_names = [
-            "Apple", "Microsoft", "Amazon", "Google", "Facebook", "Meta", 
-            "Tesla", "Netflix", "Nvidia", "Intel", "AMD", "IBM", "Oracle", 
-            "Salesforce", "Adobe", "PayPal", "Uber", "Airbnb", "Twitter", 
-            "Snapchat", "Spotify", "Disney", "Walmart", "Target", "Costco", 
-            "Nike", "Coca-Cola", "Pepsi", "McDonald's", "Starbucks"
-        ]
+        # Universe of known companies, with aliases and tickers resolving to canonical names
+        self.instrument_index = instrument_index or get_instrument_index()
+        self.company_names = self.instrument_index.names()
+        self.max_name_length = self.instrument_index.max_alias_length
+        self.company_matcher = self.instrument_index.matcher()
+        
+        # Incremental reading state of the conversation transcript
+        self.conversation_reader = TailReader(os.path.join(self.data_dir, self.conversation_file))
+        self.mentioned_companies = []
+        self.transcript_length = 0
+        self._carry = ""
         
     async def start(self, logger: Optional[logging.Logger] = None):
         """
-        Start the text interpreter controller to run every 5 seconds.
+        Start the text interpreter controller, processing the conversation whenever it changes.
         
         Args:
             logger: Logger instance to use for logging
@@ -50,28 +63,25 @@ class TextInterpreterController:
         self.is_running = True
         self.logger.info("Starting Text Interpreter Controller")
         
+        # Created first, so appends made while the conversation is processed on startup are picked up
+        self.watcher = FileWatcher(
+            os.path.join(self.data_dir, self.conversation_file),
+            self.process_conversation,
+            logger=self.logger
+        )
+        
         # Run immediately on startup
         await self.process_conversation()
         
-        # Then create background task to run every 5 seconds
-        self.task = asyncio.create_task(self._run_periodically())
-        
-    async def _run_periodically(self):
-        """Background task that runs the processor every 5 seconds"""
-        while self.is_running:
-            await asyncio.sleep(5)  # Wait for 5 seconds
-            await self.process_conversation()
+        # Then only process again when the conversation file changes
+        await self.watcher.start()
     
     async def stop(self):
-        """Stop the periodic processing"""
+        """Stop watching the conversation file"""
         self.is_running = False
-        if self.task:
-            self.task.cancel()
-            try:
-                await self.task
-            except asyncio.CancelledError:
-                pass
-            self.task = None
+        if self.watcher:
+            await self.watcher.stop()
+            self.watcher = None
         
     async def process_conversation(self):
         """Process the conversation file and extract company information"""
@@ -101,37 +111,77 @@ class TextInterpreterController:
             if self.logger:
                 self.logger.error(f"Error reading conversation file: {e}")
             return None
+    
+    def read_new_conversation(self):
+        """
+        Reads only the text appended to conversation.txt since the last read.
+        
+        Returns:
+            TailChunk: The new text and whether the file was truncated or replaced
+            None: If file could not be read
+        """
+        try:
+            return self.conversation_reader.read_new()
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Error reading conversation file: {e}")
+            return None
             
     async def parse_conversation(self, content=None):
         """
-        Parse the conversation content. If no content is provided,
-        the method will read the conversation file first.
+        Parse the conversation content. If no content is provided, only the text
+        appended to the conversation file since the last call is read and scanned,
+        and the mentioned companies are accumulated over the whole transcript.
         
         Args:
-            content (str, optional): The conversation content to parse.
+            content (str, optional): The full conversation content to parse.
             
         Returns:
-            dict: Parsed conversation data
+            dict: Parsed conversation data, raw_text holds only the newly parsed text
         """
-        if content is None:
-            content = self.read_conversation()
-            
-        if content is None:
-            return None
+        if content is not None:
+            self._reset_transcript()
+            text = content
+        else:
+            chunk = self.read_new_conversation()
+            if chunk is None:
+                return None
+            if chunk.reset:
+                self._reset_transcript()
+            text = chunk.text
             
-        # Find mentioned companies
-        mentioned_companies = self.extract_company_names(content)
+        # Find mentioned companies in the new text, including the tail of the previous
+        # text so that names split across appends are still found
+        for company in self.extract_company_names(self._carry + text):
+            if company not in self.mentioned_companies:
+                self.mentioned_companies.append(company)
+        self.transcript_length += len(text)
+        self._carry = self._tail_for_next_scan(self._carry + text)
+        mentioned_companies = list(self.mentioned_companies)
         
-        # Save to JSON if companies found
-        if mentioned_companies:
-            await self.save_mentioned_stocks(mentioned_companies)
+        # Save to JSON if companies found and they changed since the last save
+        if mentioned_companies and set(mentioned_companies) != self.last_companies:
+            if await self.save_mentioned_stocks(mentioned_companies):
+                self.last_companies = set(mentioned_companies)
             
         return {
-            "raw_text": content,
-            "length": len(content),
+            "raw_text": text,
+            "length": self.transcript_length,
             "mentioned_companies": mentioned_companies
         }
     
+    def _reset_transcript(self):
+        self.mentioned_companies = []
+        self.transcript_length = 0
+        self._carry = ""
+    
+    def _tail_for_next_scan(self, text):
+        """Return the end of text that could hold the start of a company name, starting at a word boundary."""
+        start = max(0, len(text) - self.max_name_length)
+        while start > 0 and text[start - 1].isalnum():
+            start -= 1
+        return text[start:]
+    
     def extract_company_names(self, text):
         """
         Extract company names from text.
@@ -140,81 +190,121 @@ class TextInterpreterController:
             text (str): Text to analyze
             
         Returns:
-            list: List of identified company names
+            list: List of identified company names, ordered by first mention
         """
-        mentioned_companies = []
-        
-        for company in self.company_names:
-            # Use regex with word boundaries to find whole words
-            pattern = r'\b' + re.escape(company) + r'\b'
-            if re.search(pattern, text, re.IGNORECASE):
-                mentioned_companies.append(company)
-                
-        return mentioned_companies
+        # One scan over the text for all company names
+        return self.company_matcher.companies(text)
     
     async def save_mentioned_stocks(self, companies):
         """
-        Save mentioned companies to the mentioned_stock.json file.
-        Uses get_stock_data to retrieve stock information.
+        Save stock data of all mentioned companies to the mentioned_stock.json file,
+        keyed by company. Every company is fetched again concurrently, the bar store
+        only requests the days that were not fetched before.
         
         Args:
             companies (list): List of company names to save
+            
+        Returns:
+            bool: True if the stock data of every company was saved, False otherwise
         """
         try:
             if not companies:
                 if self.logger:
                     self.logger.warning("No companies to save")
-                return
+                return False
+                
+            if self.id_chat_controller is None:
+                if self.logger:
+                    self.logger.error("IDChat controller is not initialized")
+                return False
                 
             # Ensure the directory exists
             os.makedirs(self.data_dir, exist_ok=True)
             output_file = os.path.join(self.data_dir, self.stock_file)
             
-            # Use first mentioned company
-            company_name = companies[0] if companies else ""
+            # Set date range (last year to now), refreshes only fetch the bars since the last save
+            end = datetime.now()
+            start_date = (end - timedelta(days=365)).strftime("%d.%m.%Y")
+            end_date = end.strftime("%d.%m.%Y")
             
-            if self.id_chat_controller is None:
-                if self.logger:
-                    self.logger.error("IDChat controller is not initialized")
-                return
-                
-            if not company_name:
-                if self.logger:
-                    self.logger.warning("No company name provided")
-                return
-                
-            # Use the controller to get stock data
             if self.logger:
-                self.logger.info(f"Getting stock data for company: {company_name}")
+                self.logger.info(f"Getting stock data for companies: {companies}")
+            results = await self.id_chat_controller.get_stock_data_batch(
+                company_names=companies,
+                start_date=start_date,
+                end_date=end_date
+            )
+            changed = set()
+            for company, result in results.items():
+                previous = self.mentioned_stocks.get(company)
+                if result.get("status") != "success" and previous and previous.get("status") == "success":
+                    # Keep serving the last successful fetch if a refresh fails
+                    if self.logger:
+                        self.logger.warning(f"Could not refresh stock data of {company}: {result.get('error')}")
+                    continue
+                if self._without_timestamp(result) != self._without_timestamp(previous):
+                    changed.add(company)
+                self.mentioned_stocks[company] = result
+            # Companies no longer mentioned, e.g. after the transcript was reset, are dropped
+            for company in set(self.mentioned_stocks) - set(companies):
+                del self.mentioned_stocks[company]
+                
+            failed = [company for company in companies if self.mentioned_stocks[company].get("status") != "success"]
+            if failed and self.logger:
+                self.logger.error(f"Error getting stock data for companies: {failed}")
             
-            # Set date range (last year to now)
-            start_date = "20.03.2024"
-            end_date = "20.03.2025"
+            stock_data = {
+                "companies": companies,
+                "period": f"{start_date} to {end_date}",
+                "data": {company: self.mentioned_stocks[company] for company in companies},
+                "timestamp": datetime.now().isoformat(),
+                "status": "success" if not failed else "partial" if len(failed) < len(companies) else "error"
+            }
             
-            # Call the get_stock_data method directly
-            try:
-                stock_data = await self.id_chat_controller.get_stock_data(
-                    company_name=company_name,
-                    start_date=start_date,
-                    end_date=end_date
-                )
+            # Write the stock data to JSON file off the event loop
+            await json_persister.save(output_file, stock_data)
                 
-                # Write the stock data to JSON file
-                with open(output_file, 'w', encoding='utf-8') as file:
-                    json.dump(stock_data, file, indent=4)
-                    
-                if self.logger:
-                    self.logger.info(f"Successfully saved stock data for {company_name} to {output_file}")
-                    
-            except Exception as e:
-                if self.logger:
-                    self.logger.error(f"Error getting stock data: {str(e)}")
+            if self.logger:
+                self.logger.info(f"Successfully saved stock data for {companies} to {output_file}")
+            self.publish_changes(stock_data, changed=changed)
+            return not failed
                     
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Error in save_mentioned_stocks: {str(e)}")
                 import traceback
                 self.logger.error(traceback.format_exc())
+            return False
+    
+    @staticmethod
+    def _without_timestamp(result):
+        """Stock data of a company without its fetch time, to tell whether a refetch changed it."""
+        if not isinstance(result, dict):
+            return result
+        return {key: value for key, value in result.items() if key != "timestamp"}
+    
+    def publish_changes(self, stock_data, changed):
+        """
+        Push the companies that changed since the last saved result to the subscribers.
+        
+        Args:
+            stock_data (dict): The saved mentioned stock document
+            changed (set): Companies whose stock data changed with the last fetch
+        """
+        companies = set(stock_data["companies"])
+        changed = (changed | (companies - self.published_companies)) & companies
+        removed = self.published_companies - companies
+        self.published_companies = companies
+        if not changed and not removed:
+            return
+        self.events.publish("update", {
+            "companies": stock_data["companies"],
+            "changed": {company: stock_data["data"][company] for company in stock_data["companies"] if company in changed},
+            "removed": sorted(removed),
+            "period": stock_data["period"],
+            "timestamp": stock_data["timestamp"],
+            "status": stock_data["status"]
+        })
 
 # Add to your service_initializer.py file
 from controllers.text_interpreter_controller import TextInterpreterController
@@ -1 +1,23 @@
-echo "No Tests Implemented yet"
\ No newline at end of file
+#!/bin/bash
+set -e
+
+# Fails if the cold start (importing and building the app) regresses. The cold start of
+# BASELINE_REF is measured on the same machine and may be exceeded by STARTUP_TOLERANCE,
+# STARTUP_BUDGET optionally adds an absolute limit in seconds. If the baseline is missing or
+# can not be started in this environment, only STARTUP_BUDGET is checked.
+BASELINE_REF="${BASELINE_REF:-origin/main}"
+args=(--runs "${STARTUP_RUNS:-5}" --tolerance "${STARTUP_TOLERANCE:-0.2}")
+if [ -n "$STARTUP_BUDGET" ]; then
+  args+=(--budget "$STARTUP_BUDGET")
+fi
+
+if git rev-parse --verify --quiet "$BASELINE_REF^{commit}" > /dev/null; then
+  baseline_dir="$(mktemp -d)"
+  trap 'git worktree remove --force "$baseline_dir"' EXIT
+  git worktree add --detach "$baseline_dir" "$BASELINE_REF" > /dev/null
+  args+=(--baseline "$baseline_dir")
+else
+  echo "Baseline $BASELINE_REF not found, only checking the budget" >&2
+fi
+
+python -m shared.startup_profile "${args[@]}"
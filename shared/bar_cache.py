@@ -0,0 +1,286 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from shared.constants import BAR_CACHE_FILE
+from shared.ohlcv_store import BAR_FIELDS, Bars, DateLike, OHLCVStore, to_datetime64, to_day
+
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS bars (
+    instrument TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    {", ".join(f"{field} REAL" for field in BAR_FIELDS)},
+    PRIMARY KEY (instrument, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS instruments (
+    company TEXT NOT NULL,
+    instrument TEXT NOT NULL,
+    PRIMARY KEY (company, instrument)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    company TEXT PRIMARY KEY,
+    first_day INTEGER NOT NULL,
+    last_day INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS companies (
+    company TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def _to_ms(value: DateLike) -> int:
+    return int(to_datetime64(value).astype(np.int64))
+
+
+class BarCache:
+    """
+    SQLite store of decoded OHLCV bars and company metadata that survives restarts.
+
+    Bars are indexed by (instrument, ts) and read with range scans. All methods
+    are blocking and meant to be run in a thread, e.g. with asyncio.to_thread.
+    """
+
+    def __init__(self, path: str = BAR_CACHE_FILE):
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def save_bars(self, company: str, bars: Dict[str, Bars], start: DateLike = None, end: DateLike = None) -> None:
+        """
+        Upsert the bars of a company and extend its covered date range if the fetched range touches it.
+
+        Args:
+            company: The company the bars were requested for
+            bars: Bars keyed by instrument
+            start: First date of the fetched range
+            end: Last date of the fetched range
+        """
+        key = company.casefold()
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                for instrument, series in bars.items():
+                    rows = zip(
+                        [instrument] * len(series),
+                        series.timestamp.astype("datetime64[ms]").astype(np.int64).tolist(),
+                        *(series[field].tolist() for field in BAR_FIELDS)
+                    )
+                    connection.executemany(
+                        f"INSERT OR REPLACE INTO bars VALUES (?, ?, {', '.join('?' * len(BAR_FIELDS))})",
+                        rows
+                    )
+                    connection.execute("INSERT OR IGNORE INTO instruments VALUES (?, ?)", (key, instrument))
+                if start is not None and end is not None:
+                    first_day = int(to_day(start).astype(np.int64))
+                    last_day = int(to_day(end).astype(np.int64))
+                    connection.execute(
+                        "INSERT INTO coverage VALUES (?, ?, ?) ON CONFLICT(company) DO UPDATE SET "
+                        "first_day = MIN(first_day, excluded.first_day), last_day = MAX(last_day, excluded.last_day) "
+                        "WHERE excluded.first_day <= last_day + 1 AND excluded.last_day >= first_day - 1",
+                        (key, first_day, last_day)
+                    )
+
+    def load_bars(self, instrument: str, start: DateLike = None, end: DateLike = None) -> Optional[Bars]:
+        """
+        Read the bars of an instrument between start and end (both inclusive).
+
+        Returns:
+            Bars: The stored series, None if nothing is stored in the range
+        """
+        query = f"SELECT ts, {', '.join(BAR_FIELDS)} FROM bars WHERE instrument = ?"
+        params = [instrument]
+        if start is not None:
+            query += " AND ts >= ?"
+            params.append(_to_ms(start))
+        if end is not None:
+            query += " AND ts <= ?"
+            params.append(_to_ms(end))
+        with self._lock:
+            rows = self._connect().execute(query + " ORDER BY ts", params).fetchall()
+        if not rows:
+            return None
+        table = np.array(rows, dtype=np.float64)
+        timestamp = table[:, 0].astype(np.int64).astype("datetime64[ms]")
+        columns = {field: np.ascontiguousarray(table[:, index + 1]) for index, field in enumerate(BAR_FIELDS)}
+        return Bars(instrument, timestamp, columns)
+
+    def companies(self) -> Iterator[Tuple[str, Optional[Tuple[np.datetime64, np.datetime64]], list]]:
+        """Yield each stored company with its covered range and instruments."""
+        with self._lock:
+            connection = self._connect()
+            coverage = {
+                company: (np.datetime64(first_day, "D"), np.datetime64(last_day, "D"))
+                for company, first_day, last_day in connection.execute("SELECT * FROM coverage")
+            }
+            instruments: Dict[str, list] = {}
+            for company, instrument in connection.execute("SELECT company, instrument FROM instruments"):
+                instruments.setdefault(company, []).append(instrument)
+        for company, names in instruments.items():
+            yield company, coverage.get(company), names
+
+    def load_all(self, since: DateLike = None) -> List[Tuple[str, Dict[str, Bars], Optional[Tuple[np.datetime64, np.datetime64]]]]:
+        """
+        Read the stored bars of every company.
+
+        Args:
+            since: Only load bars from this date on
+
+        Returns:
+            list: (company, bars keyed by instrument, covered range) of each stored company
+        """
+        companies = []
+        for company, coverage, instruments in self.companies():
+            bars = {}
+            for instrument in instruments:
+                series = self.load_bars(instrument, start=since)
+                if series is not None:
+                    bars[instrument] = series
+            if since is not None and coverage is not None:
+                coverage = (max(coverage[0], to_day(since)), coverage[1])
+            companies.append((company, bars, coverage))
+        return companies
+
+    def restore(self, store: OHLCVStore, companies) -> Dict[str, int]:
+        """
+        Restore bars read by load_all into an in-memory store.
+
+        Only touches the store, so it can run on the thread that owns it while
+        load_all runs in a worker thread.
+
+        Returns:
+            dict: Number of restored companies, instruments and bars
+        """
+        stats = {"companies": 0, "instruments": 0, "bars": 0}
+        for company, bars, coverage in companies:
+            store.restore(company, bars, coverage)
+            stats["companies"] += 1
+            stats["instruments"] += len(bars)
+            stats["bars"] += sum(len(series) for series in bars.values())
+        logging.info(f"Restored bar cache from {self.path}: {stats}")
+        return stats
+
+    def warm(self, store: OHLCVStore, since: DateLike = None) -> Dict[str, int]:
+        """
+        Load the stored bars into an in-memory store.
+
+        Args:
+            store: Store to restore the bars into
+            since: Only load bars from this date on
+
+        Returns:
+            dict: Number of restored companies, instruments and bars
+        """
+        return self.restore(store, self.load_all(since))
+
+    def save_company(self, company: str, data: Dict[str, Any]) -> None:
+        """Store the company metadata of a company."""
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO companies VALUES (?, ?, ?)",
+                    (company.casefold(), json.dumps(data, separators=(',', ':')), time.time())
+                )
+
+    def fingerprint(self) -> Tuple:
+        """Cheap summary of the contents, changes whenever bars or company data are written."""
+        with self._lock:
+            connection = self._connect()
+            bars = connection.execute("SELECT COUNT(*), MAX(ts) FROM bars").fetchone()
+            companies = connection.execute("SELECT COUNT(*), MAX(updated_at) FROM companies").fetchone()
+            coverage = connection.execute("SELECT SUM(first_day), SUM(last_day) FROM coverage").fetchone()
+        return bars + companies + coverage
+
+    def backup(self, path: str) -> None:
+        """Write a consistent copy of the cache to path using the SQLite online backup."""
+        with self._lock:
+            connection = self._connect()
+            target = sqlite3.connect(path)
+            try:
+                connection.backup(target)
+            finally:
+                target.close()
+
+    def merge_from(self, path: str) -> Dict[str, int]:
+        """
+        Merge the contents of another cache file, e.g. a restored snapshot.
+
+        Bars already present are kept, company data is replaced only by newer data
+        and covered ranges are only joined if they overlap or touch.
+
+        Returns:
+            dict: Number of merged bars, instruments, coverage ranges and companies
+        """
+        stats = {}
+        with self._lock:
+            connection = self._connect()
+            connection.execute("ATTACH DATABASE ? AS snapshot", (path,))
+            try:
+                with connection:
+                    statements = {
+                        "bars": "INSERT OR IGNORE INTO bars SELECT * FROM snapshot.bars",
+                        "instruments": "INSERT OR IGNORE INTO instruments SELECT * FROM snapshot.instruments",
+                        "coverage": (
+                            "INSERT INTO coverage SELECT * FROM snapshot.coverage WHERE true "
+                            "ON CONFLICT(company) DO UPDATE SET "
+                            "first_day = MIN(first_day, excluded.first_day), last_day = MAX(last_day, excluded.last_day) "
+                            "WHERE excluded.first_day <= last_day + 1 AND excluded.last_day >= first_day - 1"
+                        ),
+                        "companies": (
+                            "INSERT INTO companies SELECT * FROM snapshot.companies WHERE true "
+                            "ON CONFLICT(company) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at "
+                            "WHERE excluded.updated_at > updated_at"
+                        ),
+                    }
+                    for table, statement in statements.items():
+                        stats[table] = connection.execute(statement).rowcount
+            finally:
+                connection.execute("DETACH DATABASE snapshot")
+        return stats
+
+    def load_company(self, company: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Read the company metadata of a company.
+
+        Args:
+            company: The company
+            max_age: Ignore metadata older than this many seconds
+
+        Returns:
+            dict: The stored metadata, None if it is missing or too old
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT data, updated_at FROM companies WHERE company = ?", (company.casefold(),)
+            ).fetchone()
+        if row is None or (max_age is not None and time.time() - row[1] > max_age):
+            return None
+        return json.loads(row[0])
+
+
+bar_cache = BarCache()
@@ -0,0 +1,95 @@
+from typing import Dict
+
+import numpy as np
+
+from shared.encoding import dumps
+from shared.ohlcv_store import BAR_FIELDS, Bars
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def available_formats():
+    """Formats bars can be encoded in, binary formats only if their packages are installed."""
+    return [
+        name for name, available in (("json", True), ("msgpack", msgpack), ("arrow", pyarrow))
+        if available is not None
+    ]
+
+
+def _encode_msgpack(company: str, bars: Dict[str, Bars]) -> bytes:
+    # Columns are sent as raw little-endian arrays: int64 milliseconds since the epoch and float64 values
+    return msgpack.packb({
+        "company": company,
+        "fields": list(BAR_FIELDS),
+        "bars": {
+            instrument: {
+                "timestamp": series.timestamp.astype("datetime64[ms]").astype("<i8").tobytes(),
+                **{field: series[field].astype("<f8").tobytes() for field in BAR_FIELDS},
+            }
+            for instrument, series in bars.items()
+        },
+    })
+
+
+def _encode_arrow(company: str, bars: Dict[str, Bars]) -> bytes:
+    # One table with an instrument column, so all instruments share one record batch
+    lengths = [len(series) for series in bars.values()]
+    table = pyarrow.table({
+        "instrument": pyarrow.DictionaryArray.from_arrays(
+            np.repeat(np.arange(len(bars), dtype=np.int32), lengths),
+            list(bars)
+        ),
+        "timestamp": pyarrow.array(
+            np.concatenate([series.timestamp.astype("datetime64[ms]") for series in bars.values()]),
+            type=pyarrow.timestamp("ms")
+        ),
+        **{field: np.concatenate([series[field] for series in bars.values()]) for field in BAR_FIELDS},
+    }).replace_schema_metadata({"company": company})
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_bars(company: str, bars: Dict[str, Bars], format: str = "json") -> bytes:
+    """
+    Encode the bars of a company.
+
+    Args:
+        company: The requested company
+        bars: Bars keyed by instrument
+        format: "json", "msgpack" or "arrow" (Arrow IPC stream)
+
+    Returns:
+        bytes: The encoded bars, with the media type in MEDIA_TYPES
+
+    Raises:
+        ValueError: If the format is unknown or its package is not installed
+    """
+    if format not in available_formats():
+        raise ValueError(f"Unsupported format {format!r}, available: {', '.join(available_formats())}")
+    if format == "msgpack":
+        return _encode_msgpack(company, bars)
+    if format == "arrow":
+        return _encode_arrow(company, bars)
+    return dumps({
+        "company": company,
+        "bars": {instrument: series.to_dict() for instrument, series in bars.items()},
+        "status": "success"
+    })
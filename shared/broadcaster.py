@@ -0,0 +1,130 @@
+import asyncio
+import itertools
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Optional, Set, Tuple
+
+from shared.encoding import dumps
+
+
+class Subscription:
+    """Bounded queue of encoded events of one subscriber."""
+
+    def __init__(self, broadcaster: "Broadcaster", max_queue: int):
+        self.broadcaster = broadcaster
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = False
+
+    def _offer(self, event: Tuple[int, str, bytes]) -> bool:
+        """Queue an event without waiting, returns False if the subscriber fell behind."""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def _drop(self) -> None:
+        self.dropped = True
+        # Make room for the end marker, the subscriber has to resynchronize anyway
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Tuple[int, str, bytes]]:
+        """
+        Wait for the next event.
+
+        Returns:
+            tuple: The (id, name, data) of the event, None once the subscriber was dropped
+
+        Raises:
+            asyncio.TimeoutError: If no event arrived within timeout
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self) -> None:
+        self.broadcaster.unsubscribe(self)
+
+    async def __aiter__(self) -> AsyncIterator[Tuple[int, str, bytes]]:
+        while True:
+            event = await self.get()
+            if event is None:
+                return
+            yield event
+
+
+class Broadcaster:
+    """
+    Fans events out to many subscribers.
+
+    Each event is encoded once. Every subscriber has a bounded queue and is
+    dropped instead of slowing down the publisher when its queue is full. The
+    last events are kept, so reconnecting subscribers can catch up.
+    """
+
+    def __init__(self, max_queue: int = 16, history: int = 64):
+        """
+        Args:
+            max_queue: Events a subscriber may fall behind before it is dropped
+            history: Number of past events kept for reconnecting subscribers
+        """
+        self.max_queue = max_queue
+        self._subscribers: Set[Subscription] = set()
+        self._history: Deque[Tuple[int, str, bytes]] = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self.dropped = 0
+
+    @property
+    def last_id(self) -> int:
+        return self._history[-1][0] if self._history else 0
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Tuple[Subscription, bool]:
+        """
+        Register a subscriber.
+
+        Args:
+            last_event_id: ID of the last event the subscriber received before reconnecting
+
+        Returns:
+            tuple: The subscription and whether the missed events could be replayed. If not,
+                the subscriber has to reload the full state.
+        """
+        subscription = Subscription(self, self.max_queue)
+        replayed = True
+        if last_event_id is not None and last_event_id != self.last_id:
+            missed = [event for event in self._history if event[0] > last_event_id]
+            replayed = bool(missed) and missed[0][0] == last_event_id + 1 and len(missed) <= self.max_queue
+            if replayed:
+                for event in missed:
+                    subscription._offer(event)
+        self._subscribers.add(subscription)
+        return subscription, replayed
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, name: str, data: Any) -> int:
+        """
+        Send an event to all subscribers.
+
+        Args:
+            name: Event name
+            data: JSON serializable payload, encoded once for all subscribers
+
+        Returns:
+            int: ID of the event
+        """
+        event = (next(self._ids), name, dumps(data))
+        self._history.append(event)
+        for subscription in list(self._subscribers):
+            if not subscription._offer(event):
+                self.unsubscribe(subscription)
+                subscription._drop()
+                self.dropped += 1
+        return event[0]
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+
+mentioned_stock_events = Broadcaster()
@@ -0,0 +1,111 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Union
+
+
+class CompanyMatch:
+    """A company mention found in a text."""
+
+    __slots__ = ("company", "alias", "start", "end")
+
+    def __init__(self, company: str, alias: str, start: int, end: int):
+        self.company = company
+        self.alias = alias
+        self.start = start
+        self.end = end
+
+    def __repr__(self) -> str:
+        return f"CompanyMatch({self.company!r}, {self.alias!r}, {self.start}, {self.end})"
+
+
+def _trie_pattern(words: Iterable[str]) -> Optional[str]:
+    """
+    Build a regex from a character trie of words.
+
+    Shared prefixes are matched once, so the regex engine does not try every
+    word at every position, and longer words are preferred over their prefixes.
+    """
+    trie: Dict = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+    if not trie:
+        return None
+
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+
+    return build(trie)
+
+
+class CompanyMatcher:
+    """
+    Finds mentions of many companies in a single linear scan.
+
+    Names and aliases match case-insensitively, tickers case-sensitively so that
+    short tickers do not match ordinary words. Matches must be whole words.
+    """
+
+    def __init__(
+        self,
+        names: Union[Iterable[str], Mapping[str, str]],
+        tickers: Optional[Mapping[str, str]] = None
+    ):
+        """
+        Args:
+            names: Company names, or a mapping of names and aliases to canonical company names
+            tickers: Mapping of ticker symbols to canonical company names
+        """
+        if not isinstance(names, Mapping):
+            names = {name: name for name in names}
+        self._names = {alias.lower(): company for alias, company in names.items()}
+        self._tickers = dict(tickers or {})
+
+        groups = []
+        names_pattern = _trie_pattern(self._names)
+        if names_pattern:
+            groups.append(f"(?P<name>(?i:{names_pattern}))")
+        tickers_pattern = _trie_pattern(self._tickers)
+        if tickers_pattern:
+            groups.append(f"(?P<ticker>{tickers_pattern})")
+        self._regex = re.compile(r"(?<!\w)(?:" + "|".join(groups) + r")(?!\w)") if groups else None
+
+    def __len__(self) -> int:
+        return len(self._names) + len(self._tickers)
+
+    def finditer(self, text: str) -> Iterator[CompanyMatch]:
+        """Yield all company mentions in text, in order of appearance."""
+        if self._regex is None:
+            return
+        for match in self._regex.finditer(text):
+            alias = match.group()
+            if match.lastgroup == "name":
+                company = self._names[alias.lower()]
+            else:
+                company = self._tickers[alias]
+            yield CompanyMatch(company, alias, match.start(), match.end())
+
+    def find_all(self, text: str) -> List[CompanyMatch]:
+        """Return all company mentions in text with their positions."""
+        return list(self.finditer(text))
+
+    def counts(self, text: str) -> Dict[str, int]:
+        """Return the number of mentions per company, ordered by first mention."""
+        counts: Dict[str, int] = {}
+        for match in self.finditer(text):
+            counts[match.company] = counts.get(match.company, 0) + 1
+        return counts
+
+    def companies(self, text: str) -> List[str]:
+        """Return the mentioned companies, ordered by first mention."""
+        return list(self.counts(text))
@@ -0,0 +1,63 @@
+import gzip
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Bodies smaller than this are sent uncompressed, compressing them costs more than it saves
+MIN_COMPRESS_SIZE = 1024
+
+# Encodings in order of preference, brotli and zstd only if their packages are installed
+ENCODINGS: List[str] = [
+    encoding for encoding, available in (("br", brotli), ("zstd", zstandard), ("gzip", gzip))
+    if available is not None
+]
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the preferred supported encoding allowed by an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Header value such as "gzip, deflate, br;q=0.9"
+
+    Returns:
+        str: The encoding to use, None to send the body uncompressed
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    for encoding in ENCODINGS:
+        if weights.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with one of ENCODINGS."""
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    raise ValueError(f"Unsupported encoding {encoding!r}")
@@ -1 +1,10 @@
-S3_BUCKET_NAME = 'starthack-2025'
\ No newline at end of file
+import os
+
+S3_BUCKET_NAME = 'starthack-2025'
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+MENTIONED_STOCK_FILE = os.path.join(DATA_DIR, 'mentioned_stock.json')
+CUSTOMER_STOCKS_FILE = os.path.join(DATA_DIR, 'customer_stocks.json')
+INSTRUMENTS_FILE = os.path.join(DATA_DIR, 'instruments.json')
+CUSTOMERS_FILE = os.path.join(DATA_DIR, 'customer.json')
+BAR_CACHE_FILE = os.getenv('BAR_CACHE_FILE', os.path.join(DATA_DIR, 'bar_cache.sqlite3'))
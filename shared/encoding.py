@@ -0,0 +1,21 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(document: Any) -> bytes:
+    """Serialize a document to compact JSON bytes, using orjson if it is installed."""
+    if orjson is not None:
+        return orjson.dumps(document, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(document, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson if it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
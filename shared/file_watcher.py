@@ -0,0 +1,168 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+from typing import Awaitable, Callable, Optional
+
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+def _load_libc():
+    library = ctypes.util.find_library("c")
+    if library is None:
+        return None
+    try:
+        libc = ctypes.CDLL(library, use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def _file_key(path: str):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class FileWatcher:
+    """
+    Calls an async callback when a file changes.
+
+    Uses inotify on the parent directory where available, so atomic replaces are
+    seen as well, and falls back to polling os.stat otherwise. Bursts of writes
+    are debounced into a single callback, and events that do not change the
+    file's inode, mtime or size are ignored.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        callback: Callable[[], Awaitable[None]],
+        debounce: float = 0.25,
+        poll_interval: float = 1.0,
+        logger: Optional[logging.Logger] = None
+    ):
+        """
+        Args:
+            path: File to watch
+            callback: Coroutine function called after the file changed
+            debounce: Seconds without further events before the callback runs
+            poll_interval: Seconds between stat calls when inotify is unavailable
+            logger: Logger instance to use for logging
+        """
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self.backend = None
+        self._fd = None
+        self._changed = None
+        self._tasks = []
+        self._last_key = _file_key(self.path)
+
+    async def start(self):
+        """
+        Start watching, the state of the file when the watcher was created counts as already processed.
+
+        Create the watcher before processing the file initially, so changes made meanwhile
+        are still handled.
+        """
+        if self._tasks:
+            return
+        self._changed = asyncio.Event()
+        if _file_key(self.path) != self._last_key:
+            self._changed.set()
+        if not self._start_inotify():
+            self.backend = "polling"
+            self._tasks.append(asyncio.create_task(self._poll()))
+        self._tasks.append(asyncio.create_task(self._dispatch()))
+        self.logger.info(f"Watching {self.path} using {self.backend}")
+
+    async def stop(self):
+        """Stop watching and release the inotify descriptor."""
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def _start_inotify(self) -> bool:
+        libc = _load_libc()
+        if libc is None:
+            return False
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return False
+        directory = os.path.dirname(self.path).encode()
+        if libc.inotify_add_watch(fd, directory, _WATCH_MASK) < 0:
+            os.close(fd)
+            return False
+        self._fd = fd
+        self.backend = "inotify"
+        asyncio.get_running_loop().add_reader(fd, self._on_inotify_readable)
+        return True
+
+    def _on_inotify_readable(self):
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        name = os.path.basename(self.path).encode()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            _, _, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            start = offset + _EVENT_HEADER.size
+            event_name = buffer[start:start + length].rstrip(b"\0")
+            offset = start + length
+            if event_name == name:
+                self._changed.set()
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if _file_key(self.path) != self._last_key:
+                self._changed.set()
+
+    async def _dispatch(self):
+        while True:
+            await self._changed.wait()
+            # Wait until the burst of writes settles
+            while True:
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), self.debounce)
+                except asyncio.TimeoutError:
+                    break
+            file_key = _file_key(self.path)
+            if file_key == self._last_key or file_key is None:
+                continue
+            self._last_key = file_key
+            try:
+                await self.callback()
+            except Exception as e:
+                self.logger.error(f"Error handling change of {self.path}: {e}")
@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from shared.company_matcher import CompanyMatcher
+from shared.constants import INSTRUMENTS_FILE
+
+
+_CACHE_VERSION = 2
+
+# Listing name tokens of depositary receipts, which trade in another currency than the primary listing
+DEPOSITARY_RECEIPTS = frozenset({"adr", "bdr", "cdr", "cdi", "dr", "gdr", "idr"})
+
+
+class Instrument(NamedTuple):
+    id: str
+    name: str
+    aliases: Tuple[str, ...]
+    tickers: Tuple[str, ...]
+    isin: Optional[str]
+
+
+class InstrumentIndex:
+    """
+    Universe of known instruments with O(1) lookups by name, alias, ticker, ISIN or ID.
+
+    Names and aliases are looked up case-insensitively, tickers and ISINs exactly.
+    """
+
+    def __init__(self, instruments: Iterable[Instrument]):
+        self.instruments: Tuple[Instrument, ...] = tuple(instruments)
+        self._by_id: Dict[str, Instrument] = {}
+        self._by_name: Dict[str, Instrument] = {}
+        self._by_code: Dict[str, Instrument] = {}
+        for instrument in self.instruments:
+            self._by_id[instrument.id] = instrument
+            for name in (instrument.name,) + instrument.aliases:
+                self._by_name[name.lower()] = instrument
+            for code in instrument.tickers + ((instrument.isin,) if instrument.isin else ()):
+                self._by_code[code] = instrument
+        self._matcher = None
+
+    @classmethod
+    def from_json(cls, path: str) -> "InstrumentIndex":
+        """Parse the instrument universe from its JSON source file."""
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        return cls(
+            Instrument(
+                id=item["id"],
+                name=item["name"],
+                aliases=tuple(item.get("aliases", ())),
+                tickers=tuple(item.get("tickers", ())),
+                isin=item.get("isin")
+            )
+            for item in data.get("instruments", [])
+        )
+
+    @classmethod
+    def load(cls, path: str = INSTRUMENTS_FILE, cache_path: Optional[str] = None) -> "InstrumentIndex":
+        """
+        Load the index, reusing a compact copy on disk while the source file is unchanged.
+
+        The copy is plain JSON rather than a pickle, as the data directory is writable
+        and synced with S3, and unpickling could run code planted there.
+
+        Args:
+            path: JSON source file of the instrument universe
+            cache_path: Where to keep the cached index (default: next to the source file)
+
+        Returns:
+            InstrumentIndex: The loaded index
+        """
+        cache_path = cache_path or f"{path}.cache.json"
+        stat = os.stat(path)
+        source_key = [_CACHE_VERSION, stat.st_mtime_ns, stat.st_size]
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                cached = json.load(file)
+            if cached["key"] == source_key:
+                return cls(
+                    Instrument(id, name, tuple(aliases), tuple(tickers), isin)
+                    for id, name, aliases, tickers, isin in cached["instruments"]
+                )
+        except (OSError, ValueError, TypeError, KeyError):
+            pass
+
+        index = cls.from_json(path)
+        try:
+            directory = os.path.dirname(os.path.abspath(cache_path))
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, delete=False) as file:
+                json.dump({"key": source_key, "instruments": [list(instrument) for instrument in index.instruments]}, file)
+            os.replace(file.name, cache_path)
+        except OSError as e:
+            logging.warning(f"Could not cache instrument index to {cache_path}: {e}")
+        return index
+
+    def __len__(self) -> int:
+        return len(self.instruments)
+
+    def __contains__(self, name: str) -> bool:
+        return self.resolve(name) is not None
+
+    def resolve(self, name: str) -> Optional[Instrument]:
+        """Resolve a name, alias, ticker, ISIN or ID to its instrument."""
+        if not name:
+            return None
+        name = name.strip()
+        return self._by_code.get(name) or self._by_name.get(name.lower()) or self._by_id.get(name)
+
+    def canonical_name(self, name: str) -> str:
+        """Return the canonical name of an instrument, or name itself if it is unknown."""
+        instrument = self.resolve(name)
+        return instrument.name if instrument else name
+
+    def primary_listing(self, company: str, listings: Iterable[str]) -> Optional[str]:
+        """
+        Pick the primary listing of a company among the instrument names IDChat returned for it.
+
+        A listing containing the ISIN or a ticker of the company is preferred, then one
+        starting with its name or an alias, then one whose first word is the first word
+        of its name or an alias, as IDChat abbreviates long names ("Advanced Micro D Rg").
+        Depositary receipts such as "Amazon CDR Reg S" never match.
+
+        Args:
+            company: Name, alias, ticker or ISIN of the company
+            listings: Instrument names, e.g. "NVIDIA Rg"
+
+        Returns:
+            str: The primary listing, None if the company is unknown or no listing matches
+        """
+        instrument = self.resolve(company)
+        if instrument is None:
+            return None
+        codes = set(instrument.tickers) | ({instrument.isin} if instrument.isin else set())
+        names = [name.lower() for name in (instrument.name,) + instrument.aliases]
+        first_words = {name.split()[0] for name in names if name.split()}
+        best, best_rank = None, 0
+        for listing in listings:
+            words = re.findall(r"[\w.&'-]+", listing)
+            if not words or DEPOSITARY_RECEIPTS.intersection(word.lower() for word in words):
+                continue
+            lowered = listing.lower()
+            if codes.intersection(words):
+                rank = 3
+            elif any(lowered == name or lowered.startswith(f"{name} ") for name in names):
+                rank = 2
+            elif words[0].lower() in first_words:
+                rank = 1
+            else:
+                continue
+            if rank > best_rank:
+                best, best_rank = listing, rank
+        return best
+
+    def get(self, instrument_id: str) -> Optional[Instrument]:
+        return self._by_id.get(instrument_id)
+
+    def names(self) -> List[str]:
+        return [instrument.name for instrument in self.instruments]
+
+    @property
+    def max_alias_length(self) -> int:
+        return max((len(alias) for alias in self._by_name), default=0)
+
+    def matcher(self) -> CompanyMatcher:
+        """Return a matcher that maps mentions of names, aliases and tickers to canonical names."""
+        if self._matcher is None:
+            self._matcher = CompanyMatcher(
+                {alias: instrument.name for alias, instrument in self._by_name.items()},
+                {
+                    ticker: instrument.name
+                    for instrument in self.instruments
+                    for ticker in instrument.tickers
+                }
+            )
+        return self._matcher
+
+
+_default_index = None
+
+
+def get_instrument_index() -> InstrumentIndex:
+    """Return the process-wide instrument index, loading it on first use."""
+    global _default_index
+    if _default_index is None:
+        _default_index = InstrumentIndex.load()
+    return _default_index
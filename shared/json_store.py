@@ -0,0 +1,80 @@
+import asyncio
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from shared.encoding import dumps
+from shared.snapshot_cache import JSONSnapshot, snapshot_cache
+
+
+class JSONPersister:
+    """
+    Writes JSON documents atomically without blocking the event loop.
+
+    Serialization and file IO run in a thread pool. Files are written to a
+    temporary file in the same directory and moved into place with os.replace,
+    so readers never see a half-written file. After each write the new version
+    is published to the snapshot cache, so API readers swap in the document
+    without re-reading it from disk.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="json-store")
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._writers: Dict[str, int] = {}
+
+    async def save(self, path: str, document: Any) -> JSONSnapshot:
+        """
+        Serialize and atomically write a document, then publish it to the snapshot cache.
+
+        Args:
+            path: Destination file
+            document: JSON serializable document, must not be mutated until the call returns
+
+        Returns:
+            JSONSnapshot: The published snapshot
+        """
+        path = os.path.realpath(path)
+        # Keep writes to the same file in call order, the lock is dropped once no writer waits for it
+        lock = self._locks.get(path)
+        if lock is None:
+            lock = self._locks[path] = asyncio.Lock()
+        self._writers[path] = self._writers.get(path, 0) + 1
+        try:
+            async with lock:
+                loop = asyncio.get_running_loop()
+                body = await loop.run_in_executor(self._executor, self._write, path, document)
+                return snapshot_cache.publish(path, document, body)
+        finally:
+            self._writers[path] -= 1
+            if not self._writers[path]:
+                del self._writers[path]
+                del self._locks[path]
+
+    @staticmethod
+    def _write(path: str, document: Any) -> bytes:
+        body = dumps(document)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        file = tempfile.NamedTemporaryFile('wb', dir=directory, prefix=f".{os.path.basename(path)}.", delete=False)
+        try:
+            with file:
+                file.write(body)
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(file.name, 0o644)
+            os.replace(file.name, path)
+        except BaseException:
+            try:
+                os.unlink(file.name)
+            except FileNotFoundError:
+                pass
+            raise
+        return body
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+json_persister = JSONPersister()
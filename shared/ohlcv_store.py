@@ -0,0 +1,351 @@
+import json
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+BAR_FIELDS = ("open", "high", "low", "close", "vol", "total_return", "annualized_return")
+
+# Keys of the per-date dicts in the IDChat OHLC payload mapped to column names
+_PAYLOAD_FIELDS = {
+    "open": "open",
+    "high": "high",
+    "low": "low",
+    "close": "close",
+    "vol": "vol",
+    "Total return": "total_return",
+    "Anualized return": "annualized_return",
+}
+
+DateLike = Union[str, np.datetime64, None]
+
+
+def parse_number(value: Any) -> float:
+    """Convert payload values such as 21.4, "21.4" or "24.06%" to floats."""
+    if value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    try:
+        if value.endswith("%"):
+            return float(value[:-1].replace(",", "") + "e-2")
+        return float(value.replace(",", ""))
+    except ValueError:
+        return math.nan
+
+
+def to_datetime64(value: DateLike) -> Optional[np.datetime64]:
+    """Convert ISO ("2024-03-20") or IDChat ("20.03.2024") dates to datetime64[ms]."""
+    if value is None or isinstance(value, np.datetime64):
+        return value
+    value = str(value).strip()
+    if len(value) == 10 and value[2] == "." and value[5] == ".":
+        value = f"{value[6:]}-{value[3:5]}-{value[:2]}"
+    return np.datetime64(value, "ms")
+
+
+class Bars:
+    """Columnar OHLCV series of one instrument, sorted by timestamp."""
+
+    __slots__ = ("instrument", "timestamp", "columns")
+
+    def __init__(self, instrument: str, timestamp: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.instrument = instrument
+        self.timestamp = timestamp
+        self.columns = columns
+
+    @classmethod
+    def from_records(cls, instrument: str, records: Dict[str, Dict[str, Any]]) -> "Bars":
+        """
+        Build bars from the per-date dicts of the IDChat payload.
+
+        Args:
+            instrument: Name of the instrument
+            records: Mapping of ISO timestamps to bar dicts
+
+        Returns:
+            Bars: The decoded, sorted series
+        """
+        dates = list(records.keys())
+        timestamp = np.array(dates, dtype="datetime64[ms]")
+        columns = {}
+        for key, field in _PAYLOAD_FIELDS.items():
+            columns[field] = np.fromiter(
+                (parse_number(records[date].get(key)) for date in dates),
+                dtype=np.float64,
+                count=len(dates)
+            )
+        if np.any(timestamp[1:] < timestamp[:-1]):
+            order = np.argsort(timestamp, kind="stable")
+            timestamp = timestamp[order]
+            columns = {field: column[order] for field, column in columns.items()}
+        return cls(instrument, timestamp, columns)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Bars":
+        """Build bars from the columns returned by to_dict."""
+        timestamp = np.array(data.get("timestamp", []), dtype="datetime64[ms]")
+        columns = {}
+        for field in BAR_FIELDS:
+            values = data.get(field) or [None] * len(timestamp)
+            columns[field] = np.array([math.nan if value is None else value for value in values], dtype=np.float64)
+        return cls(data.get("instrument"), timestamp, columns)
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.columns[field]
+
+    def slice(self, start: DateLike = None, end: DateLike = None) -> "Bars":
+        """
+        Return the bars between start and end (both inclusive) without copying.
+
+        Args:
+            start: First date to include, unbounded if None
+            end: Last date to include, unbounded if None
+
+        Returns:
+            Bars: A view on the underlying columns
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.timestamp, to_datetime64(start), side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamp, to_datetime64(end), side="right"))
+        return Bars(
+            self.instrument,
+            self.timestamp[lo:hi],
+            {field: column[lo:hi] for field, column in self.columns.items()}
+        )
+
+    def merge(self, other: "Bars") -> "Bars":
+        """
+        Merge another series of the same instrument, its bars replace bars of the same date.
+
+        Returns:
+            Bars: A new series sorted by timestamp without duplicate dates
+        """
+        timestamp = np.concatenate([other.timestamp, self.timestamp])
+        # np.unique keeps the first occurrence, so bars of other win
+        timestamp, index = np.unique(timestamp, return_index=True)
+        columns = {
+            field: np.concatenate([other.columns[field], self.columns[field]])[index]
+            for field in self.columns
+        }
+        return Bars(self.instrument, timestamp, columns)
+
+    def with_returns(self) -> "Bars":
+        """
+        Recompute the return columns relative to the first bar.
+
+        The payload's returns are relative to the start of the requested window,
+        so they no longer match once windows are merged or sliced.
+        """
+        if not len(self):
+            return self
+        close = self.columns["close"]
+        total_return = close / close[0] - 1.0
+        days = (self.timestamp - self.timestamp[0]).astype("timedelta64[D]").astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            annualized_return = np.where(days > 0, (1.0 + total_return) ** (365.0 / days) - 1.0, 0.0)
+        columns = dict(self.columns, total_return=total_return, annualized_return=annualized_return)
+        return Bars(self.instrument, self.timestamp, columns)
+
+    def to_dict(self, fields: Iterable[str] = BAR_FIELDS) -> Dict[str, Any]:
+        """Return the bars as JSON serializable columns, with NaN as None."""
+        result = {
+            "instrument": self.instrument,
+            "timestamp": np.datetime_as_string(self.timestamp, unit="D").tolist(),
+        }
+        for field in fields:
+            column = self.columns[field]
+            values = column.tolist()
+            if np.isnan(column).any():
+                values = [None if math.isnan(value) else value for value in values]
+            result[field] = values
+        return result
+
+
+def decode_ohlcv_payload(response: Dict[str, Any]) -> Dict[str, Bars]:
+    """
+    Decode the nested IDChat OHLC response into columnar bars.
+
+    The price series arrive as JSON strings nested inside JSON strings:
+    response["object"] -> "data" -> per-instrument string -> per-date dicts.
+
+    Args:
+        response: The raw response of IDChatClient.ohlcv
+
+    Returns:
+        dict: Bars keyed by instrument name, empty if the response holds no series
+    """
+    try:
+        payload = response["object"]
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        data = payload["data"]
+        if isinstance(data, str):
+            data = json.loads(data)
+    except (KeyError, TypeError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    result = {}
+    for instrument, records in data.items():
+        try:
+            if isinstance(records, str):
+                records = json.loads(records)
+            result[instrument] = Bars.from_records(instrument, records)
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return result
+
+
+def to_day(value: DateLike) -> Optional[np.datetime64]:
+    """Convert a date to datetime64[D]."""
+    value = to_datetime64(value)
+    return None if value is None else value.astype("datetime64[D]")
+
+
+def format_date(value: np.datetime64) -> str:
+    """Format a date the way the IDChat API expects it (DD.MM.YYYY)."""
+    year, month, day = str(value.astype("datetime64[D]")).split("-")
+    return f"{day}.{month}.{year}"
+
+
+class OHLCVStore:
+    """
+    In-memory columnar time-series store keyed by instrument.
+
+    Records which date range has been fetched per company, so that only the
+    missing part of a requested range has to be fetched.
+    """
+
+    def __init__(self):
+        self._bars: Dict[str, Bars] = {}
+        self._instruments: Dict[str, List[str]] = {}
+        self._coverage: Dict[str, Tuple[np.datetime64, np.datetime64]] = {}
+
+    def ingest(self, company: str, response: Dict[str, Any], start: DateLike = None, end: DateLike = None) -> Dict[str, Bars]:
+        """
+        Decode an ohlcv response once and merge its series into the store.
+
+        Args:
+            company: The company the response was requested for
+            response: The raw response of IDChatClient.ohlcv
+            start: First date the response was requested for, recorded as covered
+            end: Last date the response was requested for, recorded as covered
+
+        Returns:
+            dict: The decoded bars keyed by instrument
+        """
+        decoded = decode_ohlcv_payload(response)
+        key = company.casefold()
+        if decoded:
+            for instrument, bars in decoded.items():
+                existing = self._bars.get(instrument)
+                self._bars[instrument] = existing.merge(bars) if existing is not None else bars
+            instruments = self._instruments.setdefault(key, [])
+            instruments.extend(instrument for instrument in decoded if instrument not in instruments)
+        # An empty response only extends known coverage, e.g. a range without trading days,
+        # so that unknown companies are asked for again
+        if start is not None and end is not None and (decoded or key in self._coverage):
+            self._extend_coverage(key, to_day(start), to_day(end))
+        return decoded
+
+    def restore(self, company: str, bars: Dict[str, Bars], coverage: Optional[Tuple[np.datetime64, np.datetime64]]) -> None:
+        """
+        Merge previously persisted bars of a company into the store.
+
+        Args:
+            company: The company the bars were requested for
+            bars: Bars keyed by instrument
+            coverage: The persisted (first, last) covered dates, None if unknown
+        """
+        key = company.casefold()
+        for instrument, series in bars.items():
+            existing = self._bars.get(instrument)
+            # Bars fetched since startup are newer than the persisted ones
+            self._bars[instrument] = series.merge(existing) if existing is not None else series
+        instruments = self._instruments.setdefault(key, [])
+        instruments.extend(instrument for instrument in bars if instrument not in instruments)
+        if coverage is not None and bars:
+            self._extend_coverage(key, *coverage)
+
+    def _extend_coverage(self, key: str, start: np.datetime64, end: np.datetime64) -> None:
+        # Ranges are only joined if they overlap or touch, a disjoint range leaves the
+        # coverage as is, so the days between both ranges are never marked as fetched
+        covered = self._coverage.get(key)
+        if covered is not None:
+            one_day = np.timedelta64(1, "D")
+            if start > covered[1] + one_day or end < covered[0] - one_day:
+                return
+            start, end = min(start, covered[0]), max(end, covered[1])
+        self._coverage[key] = (start, end)
+
+    def coverage(self, company: str) -> Optional[Tuple[np.datetime64, np.datetime64]]:
+        """Return the fetched date range of a company, or None if nothing was fetched."""
+        return self._coverage.get(company.casefold())
+
+    def missing_ranges(self, company: str, start: DateLike, end: DateLike) -> List[Tuple[np.datetime64, np.datetime64]]:
+        """
+        Return the date ranges of [start, end] that still have to be fetched for a company.
+
+        The ranges are adjacent to the covered range, so coverage stays contiguous.
+        Today is never considered covered, as its bar is not final yet.
+
+        Returns:
+            list: (first, last) date pairs, empty if the range is fully covered
+        """
+        start, end = to_day(start), to_day(end)
+        covered = self.coverage(company)
+        if covered is None:
+            return [(start, end)]
+        covered_start, covered_end = covered
+        covered_end = min(covered_end, np.datetime64("today", "D") - np.timedelta64(1, "D"))
+        gaps = []
+        if start < covered_start:
+            gaps.append((start, covered_start - np.timedelta64(1, "D")))
+        if end > covered_end:
+            # Fetched from the end of the covered range even if the request starts later
+            gaps.append((covered_end + np.timedelta64(1, "D"), end))
+        return gaps
+
+    def instruments(self, name: str) -> List[str]:
+        """Resolve a company or instrument name to the stored instrument names."""
+        if name in self._bars:
+            return [name]
+        return self._instruments.get(name.casefold(), [])
+
+    def get(self, name: str, start: DateLike = None, end: DateLike = None) -> Dict[str, Bars]:
+        """
+        Return the bars of a company or instrument, sliced to a date range.
+
+        Args:
+            name: Company or instrument name
+            start: First date to include
+            end: Last date to include
+
+        Returns:
+            dict: Bars keyed by instrument, empty if nothing is stored. Returns are
+                relative to the first bar in the range.
+        """
+        return {
+            instrument: self._bars[instrument].slice(start, end).with_returns()
+            for instrument in self.instruments(name)
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Number of companies with a covered range, instruments and bars in the store."""
+        return {
+            "companies": len(self._coverage),
+            "instruments": len(self._bars),
+            "bars": sum(len(bars) for bars in self._bars.values()),
+        }
+
+    def __contains__(self, name: str) -> bool:
+        return bool(self.instruments(name))
+
+
+ohlcv_store = OHLCVStore()
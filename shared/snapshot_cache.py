@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from shared.encoding import dumps, loads
+
+
+def _file_key(path: str) -> Optional[Tuple[int, int, int, int]]:
+    """Return the identity of a file on disk, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class JSONSnapshot:
+    """Parsed JSON document together with its pre-serialized response bytes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.document: Any = None
+        self.body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+        self.version = 0
+        self._file_key = None
+        self._derived: Dict[str, Tuple[int, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.body is not None
+
+    def _swap(self, document: Any, body: bytes, file_key) -> None:
+        self.document = document
+        self.body = body
+        self.etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.version += 1
+        self._file_key = file_key
+        self._derived = {}
+
+    def peek(self, name: str) -> Any:
+        """Return a value derived from the current version, None if it was not built yet."""
+        entry = self._derived.get(name)
+        return entry[1] if entry is not None and entry[0] == self.version else None
+
+    def derived(self, name: str, build: Callable[[Any], Any]) -> Any:
+        """
+        Return a value derived from the document, such as an index, built once per version.
+
+        Args:
+            name: Name of the derived value
+            build: Function building the value from the document
+
+        Returns:
+            The value built from the current version of the document
+        """
+        value = self.peek(name)
+        if value is None:
+            version, document = self.version, self.document
+            value = build(document)
+            self._derived[name] = (version, value)
+        return value
+
+    def is_stale(self) -> bool:
+        """Check whether the file on disk differs from the loaded version."""
+        file_key = _file_key(self.path)
+        if file_key is None:
+            # Keep serving a published document even if the file vanished
+            return not self.loaded
+        return file_key != self._file_key
+
+    def reload(self) -> None:
+        """
+        Re-read the file from disk if it changed since the last load.
+
+        Raises:
+            FileNotFoundError: If the file does not exist and nothing was published
+            json.JSONDecodeError: If the file does not contain valid JSON
+        """
+        with self._lock:
+            file_key = _file_key(self.path)
+            if file_key is None:
+                if self.loaded:
+                    return
+                raise FileNotFoundError(self.path)
+            if file_key == self._file_key:
+                return
+            with open(self.path, 'rb') as file:
+                raw = file.read()
+            document = loads(raw)
+            self._swap(document, serialize(document), file_key)
+
+    def publish(self, document: Any, body: Optional[bytes] = None) -> None:
+        """
+        Swap in a document produced in-process, without re-reading it from disk.
+
+        Args:
+            document: The parsed document
+            body: Pre-serialized bytes of the document, serialized here if omitted
+        """
+        if body is None:
+            body = serialize(document)
+        with self._lock:
+            self._swap(document, body, _file_key(self.path))
+
+
+def serialize(document: Any) -> bytes:
+    """Serialize a document to compact JSON bytes."""
+    return dumps(document)
+
+
+class SnapshotCache:
+    """Process-wide registry of JSON snapshots keyed by their real file path."""
+
+    def __init__(self):
+        self._snapshots: Dict[str, JSONSnapshot] = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self, path: str) -> JSONSnapshot:
+        path = os.path.realpath(path)
+        snapshot = self._snapshots.get(path)
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._snapshots.setdefault(path, JSONSnapshot(path))
+        return snapshot
+
+    async def get(self, path: str) -> JSONSnapshot:
+        """
+        Return the snapshot for a file, refreshing it off the event loop if it changed.
+
+        Args:
+            path: Path to the JSON file
+
+        Returns:
+            JSONSnapshot: The up to date snapshot
+        """
+        snapshot = self.snapshot(path)
+        if snapshot.is_stale():
+            await asyncio.to_thread(snapshot.reload)
+        return snapshot
+
+    def publish(self, path: str, document: Any, body: Optional[bytes] = None) -> JSONSnapshot:
+        """Publish a new version of a document that was just written to path."""
+        snapshot = self.snapshot(path)
+        snapshot.publish(document, body)
+        return snapshot
+
+
+snapshot_cache = SnapshotCache()
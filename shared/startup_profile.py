@@ -0,0 +1,211 @@
+"""
+Import-time profile of the process start, a built-in variant of `python -X importtime`.
+
+Call start() before the first heavy import and report() once the app is built.
+Profiling is only enabled with PROFILE_IMPORTS=1, as it adds to every import.
+Run as a module to check the cold start against a budget, or against the
+cold start of another checkout measured on the same machine:
+
+    python -m shared.startup_profile --budget 3.0
+    python -m shared.startup_profile --baseline ../main --tolerance 0.2
+"""
+import argparse
+import importlib.abc
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a loader to time the execution of the module body."""
+
+    def __init__(self, loader, profile: "ImportProfile"):
+        self._loader = loader
+        self._profile = profile
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profile._enter()
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profile._leave(module.__name__, time.perf_counter() - started)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class ImportProfile(importlib.abc.MetaPathFinder):
+    """Meta path finder recording the cumulative and self time of every imported module."""
+
+    def __init__(self):
+        self.timings: Dict[str, Tuple[float, float]] = {}
+        self.started = time.perf_counter()
+        self._children: List[float] = []
+        self._finding = False
+
+    def find_spec(self, fullname, path, target=None):
+        if self._finding:
+            return None
+        self._finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._finding = False
+
+    def _enter(self):
+        self._children.append(0.0)
+
+    def _leave(self, name: str, elapsed: float):
+        children = self._children.pop()
+        self.timings[name] = (elapsed, elapsed - children)
+        if self._children:
+            self._children[-1] += elapsed
+
+    def top(self, limit: int = 15, by_self: bool = False) -> List[Tuple[str, float, float]]:
+        """Return the slowest (module, cumulative, self) timings, top-level packages by default."""
+        entries = [(name, cumulative, own) for name, (cumulative, own) in self.timings.items()]
+        if not by_self:
+            entries = [entry for entry in entries if "." not in entry[0]]
+        return sorted(entries, key=lambda entry: entry[2] if by_self else entry[1], reverse=True)[:limit]
+
+    def report(self, limit: int = 15) -> str:
+        elapsed = time.perf_counter() - self.started
+        lines = [f"Startup took {elapsed:.3f}s, {len(self.timings)} modules imported. Slowest imports:"]
+        for name, cumulative, own in self.top(limit):
+            lines.append(f"  {cumulative * 1000:9.1f} ms  (self {own * 1000:7.1f} ms)  {name}")
+        return "\n".join(lines)
+
+
+_profile: Optional[ImportProfile] = None
+
+
+def enabled() -> bool:
+    return os.getenv("PROFILE_IMPORTS") == "1"
+
+
+def start() -> Optional[ImportProfile]:
+    """Start recording import times if PROFILE_IMPORTS=1."""
+    global _profile
+    if _profile is None and enabled():
+        _profile = ImportProfile()
+        sys.meta_path.insert(0, _profile)
+    return _profile
+
+
+def stop() -> Optional[ImportProfile]:
+    """Stop recording and return the profile, None if profiling is disabled."""
+    if _profile is not None and _profile in sys.meta_path:
+        sys.meta_path.remove(_profile)
+    return _profile
+
+
+def report(limit: int = 15) -> Optional[str]:
+    """Stop recording and return the report of the slowest imports, None if profiling is disabled."""
+    profile = stop()
+    return profile.report(limit) if profile is not None else None
+
+
+# Child process measuring the cold start: importing the app and building it.
+# It only uses api.main, so it also runs in checkouts without this module.
+_COLD_START = """
+import time
+started = time.perf_counter()
+import logging
+from api.main import create_app
+create_app(logging.getLogger("startup_profile"), None, "test", None)
+elapsed = time.perf_counter() - started
+try:
+    from shared import startup_profile
+except ImportError:
+    startup_profile = None
+report = startup_profile and startup_profile.report(%d)
+if report:
+    print(report, flush=True)
+print("COLD_START_SECONDS=%%f" %% elapsed)
+"""
+
+
+def _cold_start(root: str, limit: int, profile: bool) -> Tuple[float, str]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.getenv("PYTHONPATH")])))
+    env.pop("PROFILE_IMPORTS", None)
+    if profile:
+        env["PROFILE_IMPORTS"] = "1"
+    result = subprocess.run(
+        [sys.executable, "-c", _COLD_START % limit],
+        cwd=root, env=env, capture_output=True, text=True, check=True
+    )
+    output, _, seconds = result.stdout.rpartition("COLD_START_SECONDS=")
+    return float(seconds), output
+
+
+def measure(root: Optional[str] = None, runs: int = 3, limit: int = 15, profile: bool = True) -> Tuple[List[float], str]:
+    """
+    Measure the cold start of a checkout in fresh interpreters.
+
+    The timed runs do not profile imports, one more profiled run provides the report.
+
+    Args:
+        root: Checkout to measure, this one if None
+        runs: Number of timed runs
+        limit: Number of slowest imports in the report
+        profile: Whether to add the profiled run
+
+    Returns:
+        tuple: The durations of the timed runs in seconds and the import report
+    """
+    root = os.path.abspath(root or os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    durations = [_cold_start(root, limit, profile=False)[0] for _ in range(runs)]
+    return durations, _cold_start(root, limit, profile=True)[1] if profile else ""
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the cold start of the API")
+    parser.add_argument("--budget", type=float, default=None, help="Fail if the median cold start exceeds this many seconds")
+    parser.add_argument("--baseline", default=None, help="Checkout whose cold start is measured on this machine for comparison")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown relative to the baseline, 0.2 for 20%%")
+    parser.add_argument("--runs", type=int, default=3, help="Number of fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    args = parser.parse_args(argv)
+
+    durations, profile = measure(runs=args.runs, limit=args.top)
+    median = statistics.median(durations)
+    print(profile.rstrip())
+    print(f"Cold start: median {median:.3f}s over {len(durations)} runs ({', '.join(f'{d:.3f}' for d in durations)})")
+    failed = False
+    if args.budget is not None and median > args.budget:
+        print(f"Cold start exceeds the budget of {args.budget:.3f}s", file=sys.stderr)
+        failed = True
+    if args.baseline is not None:
+        try:
+            baseline = statistics.median(measure(args.baseline, args.runs, profile=False)[0])
+        except subprocess.CalledProcessError as e:
+            # E.g. the baseline imports packages that are no longer installed, only the budget applies then
+            error = (e.stderr or "").strip().splitlines()
+            print(f"Could not measure the baseline cold start: {error[-1] if error else e}", file=sys.stderr)
+            baseline = None
+        if baseline is not None:
+            limit = baseline * (1 + args.tolerance)
+            print(f"Baseline cold start: median {baseline:.3f}s, limit {limit:.3f}s")
+            if median > limit:
+                print(f"Cold start exceeds the baseline by more than {args.tolerance:.0%}", file=sys.stderr)
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import codecs
+import mmap
+import os
+from typing import Optional
+
+
+class TailChunk:
+    """Text appended to a file since the previous read."""
+
+    __slots__ = ("text", "reset", "offset")
+
+    def __init__(self, text: str, reset: bool, offset: int):
+        self.text = text
+        # True if the file was truncated or replaced and text starts from the beginning
+        self.reset = reset
+        self.offset = offset
+
+
+class TailReader:
+    """
+    Incrementally reads text appended to a file.
+
+    Remembers the byte offset of the last read and only decodes the new bytes,
+    using mmap when the delta is large. Truncation and rotation (a new inode)
+    restart reading from the beginning of the file.
+    """
+
+    def __init__(self, path: str, encoding: str = "utf-8", mmap_threshold: int = 1 << 20):
+        """
+        Args:
+            path: File to read
+            encoding: Text encoding of the file
+            mmap_threshold: Minimum number of new bytes for which mmap is used
+        """
+        self.path = path
+        self.encoding = encoding
+        self.mmap_threshold = mmap_threshold
+        self.offset = 0
+        self._inode = None
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    def reset(self) -> None:
+        self.offset = 0
+        self._inode = None
+        self._decoder.reset()
+
+    def read_new(self) -> Optional[TailChunk]:
+        """
+        Read the text appended since the last call.
+
+        Returns:
+            TailChunk: The new text, empty if nothing was appended
+            None: If the file does not exist
+        """
+        try:
+            file = open(self.path, "rb")
+        except FileNotFoundError:
+            return None
+        with file:
+            stat = os.fstat(file.fileno())
+            reset = False
+            if stat.st_ino != self._inode or stat.st_size < self.offset:
+                reset = self._inode is not None
+                self.reset()
+                self._inode = stat.st_ino
+            size = stat.st_size
+            if size == self.offset:
+                return TailChunk("", reset, self.offset)
+
+            if size - self.offset >= self.mmap_threshold:
+                with mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ) as mapped:
+                    data = mapped[self.offset:size]
+            else:
+                file.seek(self.offset)
+                data = file.read(size - self.offset)
+
+        self.offset += len(data)
+        # The incremental decoder keeps multi-byte sequences split across reads
+        return TailChunk(self._decoder.decode(data), reset, self.offset)
@@ -0,0 +1,95 @@
+import json
+import time
+
+import pytest
+
+botocore_session = pytest.importorskip("botocore.session")
+from botocore.stub import Stubber
+
+from clients import aws_secret_client
+from clients.aws_secret_client import AWSSecretClient
+
+
+SECRET = "db"
+REGION = "eu-central-1"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(aws_secret_client.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def stubbed():
+    client = botocore_session.get_session().create_client(
+        "secretsmanager", region_name=REGION, aws_access_key_id="testing", aws_secret_access_key="testing"
+    )
+    with Stubber(client) as stubber:
+        yield client, stubber
+
+
+def add_response(stubber, secret):
+    stubber.add_response("get_secret_value", {"SecretString": json.dumps(secret)}, {"SecretId": SECRET})
+
+
+def count_calls(client):
+    calls = []
+    client.meta.events.register("before-parameter-build.secrets-manager.GetSecretValue", lambda **kwargs: calls.append(1))
+    return calls
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_one_call_serves_every_key(stubbed, clock):
+    client, stubber = stubbed
+    add_response(stubber, {"user": "admin", "password": "secret"})
+    secrets = AWSSecretClient(client=client)
+
+    assert secrets.get_secret(SECRET, "user", REGION) == "admin"
+    assert secrets.get_secret(SECRET, "password", REGION) == "secret"
+    assert secrets.get_secret(SECRET, "user", REGION) == "admin"
+    stubber.assert_no_pending_responses()
+
+
+def test_read_ahead_of_expiry_returns_cached_value_and_refreshes_once(stubbed, clock):
+    client, stubber = stubbed
+    calls = count_calls(client)
+    add_response(stubber, {"password": "old"})
+    secrets = AWSSecretClient(client=client, ttl=100, refresh_ahead=10)
+    assert secrets.get_secret(SECRET, "password", REGION) == "old"
+
+    add_response(stubber, {"password": "new"})
+    clock.now += 95
+    assert secrets.get_secret(SECRET, "password", REGION) == "old"
+    assert secrets.get_secret(SECRET, "password", REGION) in ("old", "new")
+    wait_for(lambda: secrets.get_secret(SECRET, "password", REGION) == "new")
+
+    assert len(calls) == 2
+    stubber.assert_no_pending_responses()
+
+
+def test_invalidate_forces_a_refetch(stubbed, clock):
+    client, stubber = stubbed
+    add_response(stubber, {"password": "old"})
+    add_response(stubber, {"password": "rotated"})
+    secrets = AWSSecretClient(client=client)
+
+    assert secrets.get_secret(SECRET, "password", REGION) == "old"
+    secrets.invalidate(SECRET)
+    assert secrets.get_secret(SECRET, "password", REGION) == "rotated"
+    stubber.assert_no_pending_responses()
@@ -0,0 +1,24 @@
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+from clients.IDChat_client import IDChatClient
+
+
+def requested_url(call):
+    client = IDChatClient()
+    urls = []
+
+    async def post(url):
+        urls.append(url)
+        return {}
+
+    client._post = post
+    asyncio.run(call(client))
+    return urls[0]
+
+
+def test_company_data_search_queries_the_company_name():
+    url = requested_url(lambda client: client.company_data_search("Johnson & Johnson"))
+
+    assert urlparse(url).path == "/companydatasearch"
+    assert parse_qs(urlparse(url).query) == {"query": ["company:Johnson & Johnson"]}
@@ -0,0 +1,26 @@
+import json
+
+from shared.instrument_index import InstrumentIndex
+
+
+def test_load_reuses_a_json_cache(tmp_path):
+    source = tmp_path / "instruments.json"
+    source.write_text(json.dumps({"instruments": [
+        {"id": "apple", "name": "Apple", "aliases": ["Apple Inc."], "tickers": ["AAPL"], "isin": "US0378331005"},
+    ]}))
+
+    first = InstrumentIndex.load(str(source))
+    cached = json.loads((tmp_path / "instruments.json.cache.json").read_text())
+    second = InstrumentIndex.load(str(source))
+
+    assert cached["instruments"] == [["apple", "Apple", ["Apple Inc."], ["AAPL"], "US0378331005"]]
+    assert second.instruments == first.instruments
+    assert second.resolve("AAPL").name == "Apple"
+
+
+def test_load_ignores_a_corrupt_cache(tmp_path):
+    source = tmp_path / "instruments.json"
+    source.write_text(json.dumps({"instruments": [{"id": "tesla", "name": "Tesla"}]}))
+    (tmp_path / "instruments.json.cache.json").write_text("not json")
+
+    assert InstrumentIndex.load(str(source)).resolve("tesla").name == "Tesla"
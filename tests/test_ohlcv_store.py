@@ -0,0 +1,42 @@
+import numpy as np
+
+from shared.bar_cache import BarCache
+from shared.ohlcv_store import BAR_FIELDS, Bars, OHLCVStore
+
+
+def day(value: str) -> np.datetime64:
+    return np.datetime64(value, "D")
+
+
+def make_bars(instrument: str, first: str, last: str) -> Bars:
+    timestamp = np.arange(day(first), day(last) + np.timedelta64(1, "D")).astype("datetime64[ms]")
+    return Bars(instrument, timestamp, {field: np.ones(len(timestamp)) for field in BAR_FIELDS})
+
+
+def test_missing_ranges_after_covered_range_start_at_covered_end():
+    store = OHLCVStore()
+    store.restore("Apple", {"AAPL": make_bars("AAPL", "2024-03-20", "2024-03-31")}, (day("2024-03-20"), day("2024-03-31")))
+
+    assert store.missing_ranges("Apple", "01.01.2025", "31.01.2025") == [(day("2024-04-01"), day("2025-01-31"))]
+
+
+def test_disjoint_range_does_not_cover_the_days_in_between():
+    store = OHLCVStore()
+    store.restore("Apple", {"AAPL": make_bars("AAPL", "2024-03-20", "2024-03-31")}, (day("2024-03-20"), day("2024-03-31")))
+    store.restore("Apple", {"AAPL": make_bars("AAPL", "2025-01-01", "2025-01-31")}, (day("2025-01-01"), day("2025-01-31")))
+
+    assert store.coverage("Apple") == (day("2024-03-20"), day("2024-03-31"))
+    assert store.missing_ranges("Apple", "01.06.2024", "30.06.2024") == [(day("2024-04-01"), day("2024-06-30"))]
+
+
+def test_bar_cache_keeps_coverage_of_disjoint_ranges_apart(tmp_path):
+    cache = BarCache(str(tmp_path / "bars.sqlite3"))
+    cache.save_bars("Apple", {"AAPL": make_bars("AAPL", "2024-03-20", "2024-03-31")}, "20.03.2024", "31.03.2024")
+    cache.save_bars("Apple", {"AAPL": make_bars("AAPL", "2025-01-01", "2025-01-31")}, "01.01.2025", "31.01.2025")
+    cache.save_bars("Apple", {"AAPL": make_bars("AAPL", "2024-04-01", "2024-04-30")}, "01.04.2024", "30.04.2024")
+
+    store = OHLCVStore()
+    cache.warm(store)
+    cache.close()
+
+    assert store.coverage("Apple") == (day("2024-03-20"), day("2024-04-30"))
@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+
+from controllers.portfolio_analytics import PortfolioAnalytics
+from shared.instrument_index import Instrument, InstrumentIndex
+from shared.ohlcv_store import BAR_FIELDS, Bars
+
+
+def make_index():
+    return InstrumentIndex([
+        Instrument("amazon", "Amazon", ("Amazon.com",), ("AMZN",), "US0231351067"),
+        Instrument("amd", "AMD", ("Advanced Micro Devices",), (), "US0079031078"),
+    ])
+
+
+def make_bars(instrument, close):
+    timestamp = np.arange(np.datetime64("2024-03-20"), np.datetime64("2024-03-20") + len(close)).astype("datetime64[ms]")
+    columns = {field: np.asarray(close, dtype=np.float64) for field in BAR_FIELDS}
+    return Bars(instrument, timestamp, columns)
+
+
+def test_primary_listing_skips_depositary_receipts():
+    index = make_index()
+
+    assert index.primary_listing("Amazon", ["Amazon CDR Reg S", "Amazon.com Rg"]) == "Amazon.com Rg"
+    assert index.primary_listing("AMD", ["Advanced Micro D Rg"]) == "Advanced Micro D Rg"
+    assert index.primary_listing("Amazon", ["Amazon CDR Reg S"]) is None
+
+
+def test_non_finite_analytics_are_none():
+    bars = {"A": make_bars("A", [0.0, 1.0, 2.0, 3.0]), "B": make_bars("B", [1.0, 1.0, 1.0, 1.0])}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = PortfolioAnalytics.compute(bars, {"A": 1.0, "B": 0.0}, window=2)
+
+    assert result["instruments"]["A"]["returns"][0] is None
+    assert result["instruments"]["A"]["total_return"] is None
+    assert all(value is None for row in result["correlation"]["matrix"] for value in row[1:2])
+    json.dumps(result, allow_nan=False)
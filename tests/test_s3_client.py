@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+moto = pytest.importorskip("moto")
+boto3 = pytest.importorskip("boto3")
+from boto3.s3.transfer import TransferConfig
+
+from clients.s3_client import MB, S3FileStore, file_etag
+
+
+BUCKET = "bkt1"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-central-1")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="eu-central-1")
+        client.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": "eu-central-1"})
+        yield client
+
+
+def write_files(directory, count):
+    directory.mkdir(exist_ok=True)
+    for number in range(count):
+        (directory / f"file{number}.txt").write_text(f"content {number}")
+
+
+def test_save_and_load_folder_skip_current_files(s3, tmp_path):
+    store = S3FileStore(s3_client=s3)
+    write_files(tmp_path / "local", 6)
+
+    assert store.save_folder(tmp_path / "local", BUCKET, "folder") == {"transferred": 6, "skipped": 0}
+    assert store.save_folder(tmp_path / "local", BUCKET, "folder") == {"transferred": 0, "skipped": 6}
+
+    assert store.load_folder(tmp_path / "copy", BUCKET, "folder") == {"transferred": 6, "skipped": 0}
+    assert store.load_folder(tmp_path / "copy", BUCKET, "folder") == {"transferred": 0, "skipped": 6}
+
+    # Same size, other content: only the ETag tells them apart
+    (tmp_path / "copy" / "file0.txt").write_text("content X")
+    assert store.load_folder(tmp_path / "copy", BUCKET, "folder") == {"transferred": 1, "skipped": 5}
+    assert (tmp_path / "copy" / "file0.txt").read_text() == "content 0"
+
+
+def test_multipart_etag_matches_and_is_skipped(s3, tmp_path):
+    config = TransferConfig(multipart_threshold=5 * MB, multipart_chunksize=5 * MB)
+    store = S3FileStore(s3_client=s3, transfer_config=config)
+    (tmp_path / "local").mkdir()
+    path = tmp_path / "local" / "large.bin"
+    path.write_bytes(os.urandom(11 * MB))
+
+    assert store.save_folder(tmp_path / "local", BUCKET, "folder") == {"transferred": 1, "skipped": 0}
+    etag = s3.head_object(Bucket=BUCKET, Key="folder/large.bin")["ETag"]
+    assert etag.endswith('-3"')
+    assert file_etag(path, 5 * MB, 3) == etag
+    assert store.save_folder(tmp_path / "local", BUCKET, "folder") == {"transferred": 0, "skipped": 1}
+
+
+def test_list_objects_follows_pagination(s3):
+    for number in range(1100):
+        s3.put_object(Bucket=BUCKET, Key=f"many/{number:04d}", Body=b"x")
+
+    assert len(list(S3FileStore(s3_client=s3).list_objects(BUCKET, "many/"))) == 1100
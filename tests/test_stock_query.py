@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from controllers.stock_query import StockDocumentIndex
+
+
+RECORDS = {
+    "2024-03-20T00:00:00.000": {"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "vol": 10},
+    "2024-03-21T00:00:00.000": {"open": 1.5, "high": 2.5, "low": 1.0, "close": 2.0, "vol": 20},
+    "2024-03-22T00:00:00.000": {"open": 2.0, "high": 3.0, "low": 1.5, "close": 3.0, "vol": 30},
+}
+
+
+def raw_payload():
+    series = json.dumps({"NVIDIA Rg": json.dumps(RECORDS)})
+    return {"message": "table", "object": json.dumps({"tool": "OHLC", "data": series})}
+
+
+def customer_document():
+    return {
+        "companies": ["NVIDIA"],
+        "data": {"NVIDIA": {"summary": {}, "stock_data": raw_payload(), "stock_table": None}},
+    }
+
+
+def test_customer_document_bars_are_decoded_from_stock_data():
+    result = StockDocumentIndex(customer_document()).query(["NVIDIA"], "bars", "21.03.2024", "2024-03-22")
+
+    assert list(result["data"]["NVIDIA"]) == ["NVIDIA Rg"]
+    assert len(result["data"]["NVIDIA"]["NVIDIA Rg"]["timestamp"]) == 2
+    assert (result["from"], result["to"]) == ("2024-03-21", "2024-03-22")
+
+
+def test_customer_document_summary_has_instruments():
+    result = StockDocumentIndex(customer_document()).query(["NVIDIA"], "summary")
+
+    assert result["data"]["NVIDIA"]["instruments"]["NVIDIA Rg"]["bars"] == 3
+
+
+def test_unparseable_dates_are_rejected_before_selecting_companies():
+    with pytest.raises(ValueError):
+        StockDocumentIndex(customer_document()).query(["unknown"], "all", "not a date")